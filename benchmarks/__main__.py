@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Headless timings of the raycaster, sprite and logic kernels",
+    )
+    parser.add_argument("--poses", type=int, default=200, help="random camera poses")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the poses")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the poses")
+    parser.add_argument(
+        "--kernel", action="append", dest="kernels", help="only run this kernel"
+    )
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="use an empty numba cache so first calls include JIT compilation",
+    )
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    # must be set before pygame and numba are imported
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    if args.cold:
+        os.environ["NUMBA_CACHE_DIR"] = tempfile.mkdtemp(prefix="numba-cold-")
+
+    from benchmarks.harness import run
+    from benchmarks.poses import path_poses, random_poses
+
+    poses = random_poses(args.poses, args.seed) + path_poses()
+    report = run(poses, args.repeat, args.kernels)
+    report["cold"] = args.cold
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
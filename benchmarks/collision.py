@@ -0,0 +1,125 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+# must be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from benchmarks.harness import place, summarize
+from benchmarks.poses import random_poses
+from game.config import *
+
+pygame.init()
+pygame.display.set_mode((WIDTH, HEIGHT))
+
+from game.player import Player
+from game.sprite import Sprite, SpriteSet
+
+
+def legacy_find_collision(player, walls, dx, dy):
+    # Player.find_collision before the grid lookup: every wall and every
+    # blocking sprite is tested on each move
+    collision_list = walls + [
+        pygame.Rect(*obj.position, obj.side, obj.side)
+        for obj in player.sprites.list_of_objects()
+        if obj.blocked
+    ]
+    next_rect = player.rect.copy()
+    next_rect.move_ip(dx, dy)
+    hit_indexes = next_rect.collidelistall(collision_list)
+
+    if len(hit_indexes):
+        delta_x, delta_y = 0, 0
+        for hit_index in hit_indexes:
+            hit_rect = collision_list[hit_index]
+            if dx > 0:
+                delta_x += next_rect.right - hit_rect.left
+            else:
+                delta_x += hit_rect.right - next_rect.left
+            if dy > 0:
+                delta_y += next_rect.bottom - hit_rect.top
+            else:
+                delta_y += hit_rect.bottom - next_rect.top
+
+        if abs(delta_x - delta_y) < 20:
+            dx, dy = 0, 0
+        elif delta_x > delta_y:
+            dy = 0
+        elif delta_x < delta_y:
+            dx = 0
+    player.x += dx
+    player.y += dy
+
+
+def large_world(size, entities, seed):
+    rng = random.Random(seed)
+    grid = np.zeros((size, size), dtype=np.int32)
+    grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = 1
+    for _ in range(size * size // 10):
+        grid[rng.randrange(1, size - 1), rng.randrange(1, size - 1)] = rng.randint(1, 4)
+    walls = [
+        pygame.Rect(i * TILE, j * TILE, TILE, TILE) for j, i in zip(*np.nonzero(grid))
+    ]
+
+    sprites = SpriteSet()
+    for obj in sprites.list_of_objects():
+        sprites.remove(obj)
+    kinds = ["sprite_barrel", "enemy_soldier0", "enemy_devil1"]
+    poses = random_poses(entities, seed, grid)
+    for pose in poses:
+        sprites.add(
+            Sprite(
+                sprites.sprite_params[rng.choice(kinds)], (pose.x / TILE, pose.y / TILE)
+            )
+        )
+
+    player = Player(sprites)
+    player.grid = grid
+    return player, walls, grid
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.collision",
+        description="Grid collision against the full Rect list on a large map",
+    )
+    parser.add_argument("--size", type=int, default=200, help="map side in tiles")
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--moves", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    player, walls, grid = large_world(args.size, args.entities, args.seed)
+    moves = random_poses(args.moves, args.seed + 1, grid)
+
+    report = {"size": args.size, "entities": args.entities, "walls": len(walls)}
+    positions = {}
+    for name in ("legacy", "grid"):
+        samples, positions[name] = [], []
+        for pose in moves:
+            place(player, pose)
+            dx = PLAYER_SPEED * math.cos(pose.angle)
+            dy = PLAYER_SPEED * math.sin(pose.angle)
+            start = time.perf_counter()
+            if name == "legacy":
+                legacy_find_collision(player, walls, dx, dy)
+            else:
+                player.find_collision(dx, dy)
+            samples.append(time.perf_counter() - start)
+            positions[name].append((player.x, player.y))
+        report[name] = summarize(samples)
+    report["same_positions"] = positions["legacy"] == positions["grid"]
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
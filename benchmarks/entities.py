@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# must be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from benchmarks.harness import legacy_blocked_doors, place, summarize
+from benchmarks.poses import path_poses, random_poses
+from game.config import *
+
+pygame.init()
+pygame.display.set_mode((WIDTH, HEIGHT))
+
+from game.logic import (
+    Logic,
+    enemies_line_of_sight_parallel,
+    ray_casting_enemy_player,
+)
+from game.map import WORLD_MAP
+from game.player import Player
+from game.sprite import SPRITE_ARRAYS, Sprite, SpriteSet
+
+
+def legacy_live_enemies(sprites):
+    # Logic.check_win before the counter: a list of every live enemy per frame
+    return len(
+        [
+            obj
+            for obj in sprites.list_of_objects()
+            if obj.flag == "enemy" and not obj.is_dead
+        ]
+    )
+
+
+def legacy_deleted(sprites):
+    # Logic.clear_world before the pending list: copy and scan every object
+    return [obj for obj in sprites.list_of_objects()[:] if obj.delete]
+
+
+def legacy_line_of_sight(logic, blocked_doors, slots):
+    # Logic.enemy_action before the batched cast: one numba call per live
+    # enemy and frame (blocked_doors built once per frame here, the game built
+    # it per enemy)
+    return [
+        ray_casting_enemy_player(
+            obj.x, obj.y, blocked_doors, WORLD_MAP, logic.player.position
+        )
+        for obj in (logic.sprites.slots[slot] for slot in slots)
+    ]
+
+
+def stress_level(entities, seed):
+    rng = random.Random(seed)
+    sprites = SpriteSet()
+    for obj in sprites.list_of_objects():
+        sprites.remove(obj)
+    kinds = list(sprites.sprite_params)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for pose in random_poses(entities, seed):
+        sprites.add(
+            Sprite(
+                sprites.sprite_params[rng.choice(kinds)], (pose.x / TILE, pose.y / TILE)
+            )
+        )
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return sprites, used
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.entities",
+        description="Entity memory and per-frame bookkeeping on a stress level",
+    )
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--parallel", action="store_true", help="cast line of sight in parallel"
+    )
+    args = parser.parse_args()
+
+    sprites, used = stress_level(args.entities, args.seed)
+    rng = random.Random(args.seed + 1)
+    for obj in sprites.list_of_objects():
+        if obj.flag == "enemy" and rng.random() < 0.5:
+            sprites.kill(obj)
+
+    arrays = sum(getattr(sprites, name).nbytes for name, _, _ in SPRITE_ARRAYS)
+    report = {
+        "entities": sprites.count,
+        "bytes_per_entity": used / args.entities,
+        "sprite_bytes": sys.getsizeof(sprites.list_of_objects()[0]),
+        "array_bytes_per_entity": arrays / args.entities,
+        "live_enemies": sprites.live_enemies,
+        "same_live_enemies": sprites.live_enemies == legacy_live_enemies(sprites),
+    }
+    checks = {
+        "legacy_check_win": lambda: legacy_live_enemies(sprites),
+        "check_win": lambda: sprites.live_enemies,
+        "legacy_clear_world": lambda: legacy_deleted(sprites),
+        "clear_world": lambda: sprites.deleted and sprites.clear_deleted(),
+    }
+    for name, check in checks.items():
+        samples = []
+        for _ in range(args.frames):
+            start = time.perf_counter()
+            check()
+            samples.append(time.perf_counter() - start)
+        report[name] = summarize(samples)
+
+    # the player walks the scripted paths while every live enemy checks its
+    # line of sight, enemies stand still, then again with Logic.enemy_action
+    # moving the enemies that see the player
+    logic = Logic(Player(sprites), sprites, None)
+    if args.parallel:
+        logic.cast = enemies_line_of_sight_parallel
+    blocked_doors = legacy_blocked_doors(sprites)
+    poses = path_poses()[: args.frames]
+    agree = 0
+    legacy, batched, actions = [], [], []
+    for pose in poses:
+        place(logic.player, pose)
+        slots = sprites.live_enemy_slots()
+        start = time.perf_counter()
+        expected = legacy_line_of_sight(logic, blocked_doors, slots)
+        legacy.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        visible = logic.line_of_sight(slots)
+        batched.append(time.perf_counter() - start)
+        agree += np.mean(visible == expected)
+    report["legacy_enemy_los"] = summarize(legacy)
+    report["enemy_los"] = summarize(batched)
+    report["los_cache"] = logic.sight.stats
+    report["los_casts_per_frame"] = logic.sight.misses / len(poses)
+    # enemy and player positions within a tile share the cached answer
+    report["los_agreement"] = agree / len(poses)
+    for pose in poses:
+        place(logic.player, pose)
+        sprites.locate(logic.player)
+        start = time.perf_counter()
+        logic.enemy_action()
+        actions.append(time.perf_counter() - start)
+    report["enemy_action"] = summarize(actions)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
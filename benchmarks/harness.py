@@ -0,0 +1,171 @@
+import math
+import os
+import statistics
+import time
+
+import numba
+import pygame
+
+from game.config import *
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {
+        "samples": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1e3,
+        "median_ms": statistics.median(ordered) * 1e3,
+        "p95_ms": percentile(95) * 1e3,
+        "p99_ms": percentile(99) * 1e3,
+        "min_ms": ordered[0] * 1e3,
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+
+def legacy_blocked_doors(sprites):
+    # SpriteSet.blocked_doors before the door grid: a typed Dict of the closed
+    # door tiles, built from every object on each access
+    from numba.core import types
+    from numba.typed import Dict
+    from game.raycaster import mapping
+
+    blocked_doors = Dict.empty(
+        key_type=types.UniTuple(numba.int32, 2), value_type=numba.int32
+    )
+    for obj in sprites.list_of_objects():
+        if (obj.flag == "door_h" or obj.flag == "door_v") and obj.blocked:
+            blocked_doors[mapping(obj.x, obj.y)] = 0
+    return blocked_doors
+
+
+def place(player, pose):
+    player.x, player.y, player.angle = pose
+    player.rect.center = player.x, player.y
+
+
+def time_kernel(kernel, player, poses, repeat=1):
+    # the first call is reported on its own, it includes numba compilation
+    # or cache loading
+    place(player, poses[0])
+    start = time.perf_counter()
+    kernel()
+    first_call = time.perf_counter() - start
+
+    samples = []
+    for _ in range(repeat):
+        for pose in poses:
+            place(player, pose)
+            start = time.perf_counter()
+            kernel()
+            samples.append(time.perf_counter() - start)
+
+    result = summarize(samples)
+    result["first_call_ms"] = first_call * 1e3
+    return result
+
+
+class World:
+    def __init__(self):
+        pygame.init()
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        self.clock = pygame.time.Clock()
+
+        from game.logic import Logic
+        from game.player import Player
+        from game.renderer import FrameBufferRenderer
+        from game.sprite import SpriteSet
+        from game.ui import UI
+
+        self.sprites = SpriteSet()
+        self.player = Player(self.sprites)
+        self.ui = UI(
+            self.screen, pygame.Surface(MAP_RESOLUTION), self.player, self.clock
+        )
+        self.logic = Logic(self.player, self.sprites, self.ui)
+        self.frame_buffer = FrameBufferRenderer(self.screen, self.ui.textures)
+
+    def kernels(self):
+        from game.logic import ray_casting_enemy_player
+        from game.map import WORLD_MAP
+        from game.raycaster import caster, ray_casting, ray_casting_walls
+
+        player, sprites, ui, logic = self.player, self.sprites, self.ui, self.logic
+
+        def locate():
+            return sprites.locate(player)
+
+        def legacy_enemy_los():
+            # Logic.enemy_action line of sight before the door grid: the
+            # blocked doors rebuilt for every enemy
+            return [
+                ray_casting_enemy_player(
+                    sprites.slots[slot].x,
+                    sprites.slots[slot].y,
+                    legacy_blocked_doors(sprites),
+                    WORLD_MAP,
+                    player.position,
+                )
+                for slot in sprites.live_enemy_slots()
+            ]
+
+        def collision():
+            sin_a, cos_a = math.sin(player.angle), math.cos(player.angle)
+            player.find_collision(PLAYER_SPEED * cos_a, PLAYER_SPEED * sin_a)
+
+        def overlay():
+            ui.fps(self.clock)
+            ui.mini_map()
+            ui.player_weapon([(float("inf"), 0)])
+
+        def frame():
+            ui.background()
+            walls, wall_shot = ray_casting_walls(player, ui.wall_textures)
+            ui.world(walls + sprites.locate(player, caster.depths, caster.heights))
+            ui.fps(self.clock)
+            ui.mini_map()
+            ui.player_weapon([wall_shot, sprites.sprite_shot(player)])
+            pygame.display.flip()
+
+        return {
+            "ray_casting": lambda: ray_casting(
+                player.position, player.angle, WORLD_MAP
+            ),
+            "ray_casting_dda": lambda: caster.cast(player),
+            "ray_casting_walls": lambda: ray_casting_walls(player, ui.wall_textures),
+            "framebuffer": lambda: self.frame_buffer.draw(player),
+            "object_locate": locate,
+            "enemy_action": logic.enemy_action,
+            "legacy_enemy_los": legacy_enemy_los,
+            "enemy_los": lambda: logic.line_of_sight(sprites.live_enemy_slots()),
+            "find_collision": collision,
+            "legacy_blocked_doors": lambda: legacy_blocked_doors(sprites),
+            "overlay": overlay,
+            "frame": frame,
+        }
+
+
+def run(poses, repeat=1, names=None):
+    world = World()
+    kernels = world.kernels()
+    report = {
+        "numba": numba.__version__,
+        "numba_cache_dir": os.environ.get("NUMBA_CACHE_DIR", "__pycache__"),
+        "poses": len(poses),
+        "repeat": repeat,
+        "kernels": {},
+    }
+    for name in names or kernels:
+        report["kernels"][name] = time_kernel(
+            kernels[name], world.player, poses, repeat
+        )
+    from game.cache import scaled_surfaces
+
+    report["scale_cache"] = scaled_surfaces.stats
+    report["los_cache"] = world.logic.sight.stats
+    if "frame" in report["kernels"]:
+        report["fps"] = 1000 / report["kernels"]["frame"]["mean_ms"]
+    return report
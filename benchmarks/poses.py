@@ -0,0 +1,77 @@
+import math
+import random
+from collections import deque, namedtuple
+
+from game.config import *
+from game.map import GRID_MAP
+
+Pose = namedtuple("Pose", ["x", "y", "angle"])
+
+# start and goal tiles (column, row) of the scripted walks through level.txt
+PATHS = {
+    "north_to_south": ((1, 1), (22, 14)),
+    "south_to_north": ((1, 14), (22, 1)),
+}
+
+
+def open_tiles(grid=GRID_MAP):
+    rows, columns = grid.shape
+    return [(i, j) for j in range(rows) for i in range(columns) if not grid[j, i]]
+
+
+def random_poses(count, seed=0, grid=GRID_MAP):
+    rng = random.Random(seed)
+    tiles = open_tiles(grid)
+    poses = []
+    for _ in range(count):
+        i, j = rng.choice(tiles)
+        poses.append(
+            Pose(
+                (i + rng.uniform(0.25, 0.75)) * TILE,
+                (j + rng.uniform(0.25, 0.75)) * TILE,
+                rng.uniform(0, 2 * math.pi),
+            )
+        )
+    return poses
+
+
+def tile_path(start, goal, grid=GRID_MAP):
+    rows, columns = grid.shape
+    previous = {start: None}
+    queue = deque([start])
+    while queue:
+        tile = queue.popleft()
+        if tile == goal:
+            break
+        i, j = tile
+        for step in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+            x, y = step
+            if 0 <= x < columns and 0 <= y < rows and not grid[y, x]:
+                if step not in previous:
+                    previous[step] = tile
+                    queue.append(step)
+    if goal not in previous:
+        raise ValueError(f"no path from {start} to {goal}")
+    path = [goal]
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+    return path[::-1]
+
+
+def walk(path, step=TILE // 4):
+    poses = []
+    points = [((i + 0.5) * TILE, (j + 0.5) * TILE) for i, j in path]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        angle = math.atan2(y1 - y0, x1 - x0) % (2 * math.pi)
+        steps = int(math.hypot(x1 - x0, y1 - y0) // step)
+        for n in range(steps):
+            t = n / steps
+            poses.append(Pose(x0 + (x1 - x0) * t, y0 + (y1 - y0) * t, angle))
+    return poses
+
+
+def path_poses(grid=GRID_MAP):
+    poses = []
+    for start, goal in PATHS.values():
+        poses += walk(tile_path(start, goal, grid))
+    return poses
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numba
+import numpy as np
+
+from benchmarks.harness import summarize
+from benchmarks.poses import path_poses, random_poses
+from game.raycaster import RayCaster
+
+
+def time_cast(caster, poses):
+    caster.cast(poses[0])
+    samples = []
+    for pose in poses:
+        start = time.perf_counter()
+        caster.cast(pose)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def cast_all(caster, poses):
+    outputs = []
+    for pose in poses:
+        caster.cast(pose)
+        outputs.append(
+            [
+                caster.depths.copy(),
+                caster.offsets.copy(),
+                caster.heights.copy(),
+                caster.textures.copy(),
+            ]
+        )
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.raycast",
+        description="Serial against parallel wall casting at several resolutions",
+    )
+    parser.add_argument("--poses", type=int, default=200, help="random camera poses")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the poses")
+    parser.add_argument(
+        "--rays", type=int, nargs="+", default=[300, 1200, 2400], help="ray counts"
+    )
+    parser.add_argument(
+        "--threads", type=int, nargs="+", default=[1, 2, 4, 8], help="thread counts"
+    )
+    args = parser.parse_args()
+
+    poses = random_poses(args.poses, args.seed) + path_poses()
+    report = {
+        "cpus": os.cpu_count(),
+        "numba_threads": numba.config.NUMBA_NUM_THREADS,
+        "rays": {},
+    }
+    for rays in args.rays:
+        caster = RayCaster(rays, threads=1)
+        serial = time_cast(caster, poses)
+        expected = cast_all(caster, poses)
+        results = {"serial": serial}
+        for threads in args.threads:
+            # NUMBA_NUM_THREADS sizes the pool, set it to try more threads
+            # than there are cores
+            if threads > numba.config.NUMBA_NUM_THREADS:
+                results[threads] = "skipped, above NUMBA_NUM_THREADS"
+                continue
+            caster.set_threads(threads)
+            result = time_cast(caster, poses)
+            result["speedup"] = serial["median_ms"] / result["median_ms"]
+            result["same"] = all(
+                all(np.array_equal(a, b) for a, b in zip(got, want))
+                for got, want in zip(cast_all(caster, poses), expected)
+            )
+            results[threads] = result
+        report["rays"][rays] = results
+    report["threading_layer"] = numba.threading_layer()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
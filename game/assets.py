@@ -0,0 +1,303 @@
+import argparse
+import glob
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+
+import pygame
+from game.cache import scaled_surfaces
+from game.config import *
+
+# header: magic, version, offset and length of the JSON index at the end of the
+# file; the pixels start right after the header
+BUNDLE_HEADER = struct.Struct("<4sIQQ")
+BUNDLE_MAGIC = b"RCAB"
+BUNDLE_VERSION = 1
+BUNDLE_ALIGN = 64
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def pack(paths, output=ASSET_BUNDLE):
+    # decode every image once and store its pixels as BGRA, the byte order of
+    # convert_alpha surfaces, so the game can wrap them without converting
+    if pygame.display.get_surface() is None:
+        pygame.display.init()
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    index = {}
+    with open(output + ".tmp", "wb") as file:
+        file.write(bytes(BUNDLE_ALIGN))
+        for path in paths:
+            # convert_alpha applies palette colorkeys like the game would
+            image = pygame.image.load(path).convert_alpha()
+            index[os.path.normpath(path)] = {
+                "offset": file.tell(),
+                "size": image.get_size(),
+                "source": source_stamp(path),
+            }
+            file.write(pygame.image.tobytes(image, "BGRA"))
+            file.write(bytes(-file.tell() % BUNDLE_ALIGN))
+        index_offset = file.tell()
+        index_data = json.dumps(index).encode()
+        file.write(index_data)
+        file.seek(0)
+        file.write(
+            BUNDLE_HEADER.pack(
+                BUNDLE_MAGIC, BUNDLE_VERSION, index_offset, len(index_data)
+            )
+        )
+    os.replace(output + ".tmp", output)
+    return index
+
+
+class AssetBundle:
+    def __init__(self, path=ASSET_BUNDLE):
+        self.path = path
+        self.index = {}
+        self.buffer = None
+        self.hits = 0
+        self.misses = 0
+        self.alpha_format = None
+        self.opened = False
+        self.lock = threading.Lock()
+        # off for simulations without a display: images are decoded but not
+        # converted to the display format
+        self.convert = True
+
+    def open(self):
+        # mapped on first use, so packing does not hold the old bundle open;
+        # the first use may be on the prefetch thread
+        with self.lock:
+            if not self.opened:
+                self.map()
+
+    def map(self):
+        self.opened = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as file:
+            magic, version, index_offset, index_length = BUNDLE_HEADER.unpack(
+                file.read(BUNDLE_HEADER.size)
+            )
+            if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+                return
+            # copy-on-write mapping: surfaces need a writable buffer, pages are
+            # only read from disk when touched
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.index = json.loads(self.buffer[index_offset : index_offset + index_length])
+
+    def __len__(self):
+        return len(self.index)
+
+    def surface(self, path):
+        entry = self.index.get(os.path.normpath(path))
+        if entry is None or entry["source"] != source_stamp(path):
+            return None
+        width, height = entry["size"]
+        start = entry["offset"]
+        view = memoryview(self.buffer)[start : start + width * height * 4]
+        return pygame.image.frombuffer(view, (width, height), "BGRA")
+
+    def decode(self, path):
+        # the pixels of path as stored, from the bundle or the PNG; safe off
+        # the main thread, nothing is converted to the display format
+        if not self.opened:
+            self.open()
+        surface = self.surface(path) if self.buffer is not None else None
+        if surface is None:
+            self.misses += 1
+            return pygame.image.load(path)
+        self.hits += 1
+        return surface
+
+    def display_format(self, surface, alpha=True):
+        # main thread only, SDL does not promise conversion to the display
+        # format is thread safe; bundle surfaces are already in it
+        if not self.convert:
+            return surface
+        if not alpha:
+            return surface.convert()
+        if self.alpha_format is None:
+            self.alpha_format = pygame.Surface((1, 1)).convert_alpha().get_masks()
+        if surface.get_masks() != self.alpha_format:
+            return surface.convert_alpha()
+        return surface
+
+    def load(self, path, alpha=True):
+        return self.display_format(self.decode(path), alpha)
+
+
+assets = AssetBundle()
+
+
+def load_image(path, alpha=True):
+    return assets.load(path, alpha)
+
+
+class FrameSet:
+    # animation frames decoded on first access and dropped again by FrameSets
+    # when not drawn for a while
+    def __init__(self, paths, registry=None):
+        self.paths = tuple(paths)
+        self.frames = None
+        # decoded by the prefetch thread, converted on the main thread
+        self.decoded = None
+        self.last_used = 0
+        self.lock = threading.Lock()
+        self.registry = frame_sets if registry is None else registry
+        self.registry.add(self)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        frames = self.frames
+        if frames is None:
+            frames = self.load()
+        self.last_used = self.registry.frame
+        return frames[index]
+
+    @property
+    def loaded(self):
+        return self.frames is not None
+
+    @property
+    def bytes(self):
+        frames = self.frames
+        if frames is None:
+            return 0
+        return sum(frame.get_width() * frame.get_height() * 4 for frame in frames)
+
+    def decode(self):
+        # on the prefetch thread, a set being decoded is waited for by load
+        # instead of decoded twice
+        with self.lock:
+            if self.frames is None and self.decoded is None:
+                self.decoded = [assets.decode(path) for path in self.paths]
+
+    def load(self):
+        # main thread only
+        with self.lock:
+            frames = self.frames
+            if frames is None:
+                decoded = self.decoded
+                if decoded is None:
+                    decoded = [assets.decode(path) for path in self.paths]
+                frames = [assets.display_format(surface) for surface in decoded]
+                self.frames = frames
+                self.decoded = None
+                self.registry.loads += 1
+        return frames
+
+    def unload(self):
+        frames, self.frames = self.frames, None
+        # the scaled copies keep their source alive
+        if frames is not None:
+            scaled_surfaces.discard(frames)
+
+
+class FrameSets:
+    def __init__(
+        self,
+        unload_frames=ANIMATION_UNLOAD_FRAMES,
+        check_frames=ANIMATION_CHECK_FRAMES,
+    ):
+        self.unload_frames = unload_frames
+        self.check_frames = check_frames
+        self.sets = []
+        self.frame = 0
+        self.loads = 0
+        self.unloads = 0
+        self.requests = queue.SimpleQueue()
+        # decoded by the prefetch thread, to be converted by tick
+        self.decoded = queue.SimpleQueue()
+        self.requested = set()
+        self.thread = None
+
+    def add(self, frame_set):
+        self.sets.append(frame_set)
+
+    def tick(self):
+        self.frame += 1
+        while not self.decoded.empty():
+            frame_set = self.decoded.get()
+            frame_set.load()
+            self.requested.discard(id(frame_set))
+        if self.frame % self.check_frames:
+            return
+        for frame_set in self.sets:
+            if (
+                frame_set.loaded
+                and self.frame - frame_set.last_used > self.unload_frames
+                and id(frame_set) not in self.requested
+            ):
+                frame_set.unload()
+                self.unloads += 1
+
+    def prefetch(self, frame_set):
+        # decode in the background so the set is ready when first drawn
+        if frame_set.loaded or id(frame_set) in self.requested:
+            return
+        frame_set.last_used = self.frame
+        self.requested.add(id(frame_set))
+        self.requests.put(frame_set)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.load_requests, daemon=True)
+            self.thread.start()
+
+    def load_requests(self):
+        while True:
+            frame_set = self.requests.get()
+            frame_set.decode()
+            self.decoded.put(frame_set)
+
+    @property
+    def stats(self):
+        loaded = [frame_set for frame_set in self.sets if frame_set.loaded]
+        return {
+            "sets": len(self.sets),
+            "loaded": len(loaded),
+            "bytes": sum(frame_set.bytes for frame_set in loaded),
+            "loads": self.loads,
+            "unloads": self.unloads,
+        }
+
+    def summary(self):
+        stats = self.stats
+        return (
+            f"animations: {stats['loaded']}/{stats['sets']} sets,"
+            f" {stats['bytes'] / 2 ** 20:.0f} MB"
+        )
+
+
+frame_sets = FrameSets()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m game.assets",
+        description="Pack the sprite frames and textures into one bundle",
+    )
+    parser.add_argument("--output", default=ASSET_BUNDLE)
+    parser.add_argument(
+        "directories", nargs="*", default=["./game/sprites", "./game/textures"]
+    )
+    args = parser.parse_args()
+
+    paths = sorted(
+        path
+        for directory in args.directories
+        for path in glob.glob(os.path.join(directory, "**", "*.png"), recursive=True)
+    )
+    index = pack(paths, args.output)
+    print(f"{len(index)} images, {os.path.getsize(args.output) / 2 ** 20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+from game.config import *
+
+
+class ScaledSurfaceCache:
+    def __init__(self, budget=SCALE_CACHE_BUDGET, quantum=SCALE_CACHE_QUANTUM):
+        self.budget = budget
+        self.quantum = quantum
+        # (id(source), width, height) -> (source, scaled, bytes), oldest first
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, size):
+        return tuple(
+            max(0, int(round(length / self.quantum)) * self.quantum) for length in size
+        )
+
+    def scale(self, surface, size):
+        width, height = self.quantize(size)
+        key = (id(surface), width, height)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        scaled = pygame.transform.scale(surface, (width, height))
+        size_bytes = width * height * scaled.get_bytesize()
+        if size_bytes > self.budget:
+            return scaled
+        # the source is kept alive with the entry so its id is not reused
+        self.entries[key] = (surface, scaled, size_bytes)
+        self.bytes += size_bytes
+        while self.bytes > self.budget:
+            _, (_, _, evicted_bytes) = self.entries.popitem(last=False)
+            self.bytes -= evicted_bytes
+            self.evictions += 1
+        return scaled
+
+    def discard(self, surfaces):
+        # drops the scaled copies of surfaces, so the sources can be freed
+        sources = {id(surface) for surface in surfaces}
+        for key in [key for key in self.entries if key[0] in sources]:
+            self.bytes -= self.entries.pop(key)[2]
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def summary(self):
+        stats = self.stats
+        return (
+            f"scale cache: {stats['hit_rate']:.0%} hits, {stats['entries']} surfaces,"
+            f" {stats['bytes'] / 2 ** 20:.1f}/{self.budget / 2 ** 20:.0f} MB"
+        )
+
+
+scaled_surfaces = ScaledSurfaceCache()
+
+
+class LineOfSightCache:
+    def __init__(self, shape, player_tiles=LOS_CACHE_PLAYER_TILES):
+        # grid of the enemy tiles per player tile: 1 visible, 0 hidden, -1 not
+        # cast yet, valid for one door version; least recently used last
+        self.shape = shape
+        self.player_tiles = player_tiles
+        self.memos = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def memo(self, player_tile, version):
+        if version != self.version:
+            self.clear()
+            self.version = version
+        memo = self.memos.get(player_tile)
+        if memo is not None:
+            self.memos.move_to_end(player_tile, last=False)
+            return memo
+
+        memo = np.full(self.shape, -1, dtype=np.int8)
+        self.memos[player_tile] = memo
+        self.memos.move_to_end(player_tile, last=False)
+        if len(self.memos) > self.player_tiles:
+            self.memos.popitem()
+        return memo
+
+    def record(self, lookups, casts):
+        self.hits += lookups - casts
+        self.misses += casts
+
+    def clear(self):
+        if self.memos:
+            self.invalidations += 1
+        self.memos.clear()
+
+    @property
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": sum(int((memo >= 0).sum()) for memo in self.memos.values()),
+            "player_tiles": len(self.memos),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def summary(self):
+        stats = self.stats
+        return (
+            f"line of sight: {stats['hit_rate']:.0%} cached,"
+            f" {stats['misses']} casts, {stats['entries']} pairs"
+        )
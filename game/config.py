@@ -15,6 +15,34 @@ DOUBLE_HEIGHT = 2 * HEIGHT
 FPS = 60
 FPS_POSITION = (5, 5)
 
+# Fixed simulation step: the player, enemies, doors and animations advance
+# TICK_RATE times a second whatever the frame rate, a slow frame catches up
+# at most MAX_TICKS_PER_FRAME ticks
+TICK_RATE = FPS
+MAX_TICKS_PER_FRAME = 5
+
+# Timedemo: seed of the random module while a demo plays, and the upper edges
+# of the frame time histogram (ms)
+TIMEDEMO_SEED = 0
+TIMEDEMO_HISTOGRAM_MS = (4, 8, 12, 16, 20, 33, 50, 100)
+
+# Frame profiler (F3 toggles the graph)
+PROFILER_PHASES = (
+    "movement",
+    "background",
+    "walls",
+    "sprites",
+    "world",
+    "overlay",
+    "mini_map",
+    "weapon",
+    "logic",
+    "flip",
+)
+PROFILER_FRAMES = 1024
+PROFILER_GRAPH_SIZE = (240, 100)
+PROFILER_GRAPH_MS = 50
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -60,13 +88,57 @@ DISTANCE = NUM_RAYS / (2 * math.tan(HALF_FOV))
 PROJECTION_COEFFICIENT = 3 * DISTANCE * TILE
 SCALE = WIDTH // NUM_RAYS
 
+# Dynamic resolution: ray counts to switch between (divisors of WIDTH), the
+# frame rate to hold and the fraction of the frame budget that triggers a
+# step down or up, measured over a window of frames
+RESOLUTION_LADDER = (120, 150, 200, 240, 300, 400, 600, 1200)
+RESOLUTION_TARGET_FPS = FPS
+RESOLUTION_WINDOW = 30
+RESOLUTION_DOWNSCALE_AT = 1.1
+RESOLUTION_UPSCALE_AT = 0.7
+
 # Sprites
 CENTER_RAY = NUM_RAYS // 2 - 1
 FAKE_RAYS = 200
 FAKE_RAYS_RANGE = NUM_RAYS - 1 + 2 * FAKE_RAYS
 
+# Scaled sprite surfaces cache
+SCALE_CACHE_BUDGET = 64 * 2**20
+SCALE_CACHE_QUANTUM = 4
+
+# Enemy line of sight: results kept per (enemy tile, player tile) for the
+# LOS_CACHE_PLAYER_TILES most recent player tiles, and whether the batched cast
+# runs on the numba thread pool
+LOS_CACHE_PLAYER_TILES = 64
+LOS_PARALLEL = False
+
+# threads casting the walls, more than one casts them in parallel on the
+# numba thread pool (at most NUMBA_NUM_THREADS)
+RAY_CASTING_THREADS = 1
+
+# Wall renderer: "columns" (scaled surface per ray) or "framebuffer" (NumPy)
+RENDERER = "columns"
+
 # Textures
 TEXTURE_WIDTH = 1200
 TEXTURE_HEIGHT = 1200
 HALF_TEXTURE_HEIGHT = TEXTURE_HEIGHT // 2
 TEXTURE_SCALE = TEXTURE_WIDTH // TILE
+WALL_MIP_MIN_HEIGHT = 32
+
+# Packed sprite frames and textures, built with python -m game.assets
+ASSET_BUNDLE = "./game/assets.bin"
+
+# Sprite animations are loaded when first drawn, prefetched for the objects
+# within ANIMATION_PREFETCH_RADIUS and dropped after ANIMATION_UNLOAD_FRAMES
+# frames without being drawn
+ANIMATION_PREFETCH_RADIUS = 8 * TILE
+ANIMATION_PREFETCH_FRAMES = 30
+ANIMATION_UNLOAD_FRAMES = 1800
+ANIMATION_CHECK_FRAMES = 60
+
+# Floor and ceiling of the framebuffer renderer: wall texture id, or None for
+# the flat floor color and the sky
+FLOOR_TEXTURE = 3
+CEILING_TEXTURE = None
+PLANE_TEXTURE_SIZE = 256
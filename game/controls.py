@@ -0,0 +1,149 @@
+import random
+
+import numpy as np
+import pygame
+from game.config import *
+
+# keys the player reads, in the order of the bits of a recorded step
+CONTROL_KEYS = (
+    pygame.K_w,
+    pygame.K_s,
+    pygame.K_a,
+    pygame.K_d,
+    pygame.K_LEFT,
+    pygame.K_RIGHT,
+)
+
+
+class PressedKeys(frozenset):
+    # indexed by key like pygame.key.get_pressed()
+    def __getitem__(self, key):
+        return key in self
+
+
+class LiveInput:
+    # keyboard and mouse of the game window
+    def pressed(self):
+        return pygame.key.get_pressed()
+
+    def events(self):
+        return pygame.event.get()
+
+    def turn(self):
+        # horizontal mouse movement in pixels since the last tick
+        if pygame.mouse.get_focused():
+            difference = pygame.mouse.get_pos()[0] - HALF_WIDTH
+            pygame.mouse.set_pos([HALF_WIDTH, HALF_HEIGHT])
+            return difference
+        return 0
+
+
+class ScriptedInput:
+    # steps of (keys held, mouse turn, clicked), one per simulation tick; the
+    # last step is held once the script runs out. A game window, if any, is
+    # still pumped so it answers the OS and can be closed, its input is dropped
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.step = 0
+
+    @property
+    def finished(self):
+        return self.step >= len(self.steps)
+
+    def current(self):
+        return self.steps[min(self.step, len(self.steps) - 1)]
+
+    def pressed(self):
+        return PressedKeys(self.current()[0])
+
+    def events(self):
+        events = []
+        if pygame.display.get_init():
+            events = [
+                event for event in pygame.event.get() if event.type == pygame.QUIT
+            ]
+        if self.current()[2]:
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1))
+        return events
+
+    def turn(self):
+        # read last in Player.movement, so the script moves on here
+        turn = self.current()[1]
+        self.step += 1
+        return turn
+
+
+class RecordingInput:
+    # passes another input through and keeps the step it gave every tick
+    def __init__(self, source):
+        self.source = source
+        self.steps = []
+        self.keys = ()
+        self.clicked = False
+
+    def pressed(self):
+        pressed = self.source.pressed()
+        self.keys = tuple(key for key in CONTROL_KEYS if pressed[key])
+        return pressed
+
+    def events(self):
+        events = self.source.events()
+        self.clicked = any(
+            event.type == pygame.MOUSEBUTTONDOWN and event.button == 1
+            for event in events
+        )
+        return events
+
+    def turn(self):
+        # read last in Player.movement, so the step is complete here
+        turn = self.source.turn()
+        self.steps.append((self.keys, turn, self.clicked))
+        return turn
+
+    def save(self, path, tick_rate=TICK_RATE):
+        save_demo(path, self.steps, tick_rate)
+
+
+def save_demo(path, steps, tick_rate=TICK_RATE):
+    # a byte of held CONTROL_KEYS bits, the mouse turn and the click of each tick
+    keys = [
+        sum(1 << bit for bit, key in enumerate(CONTROL_KEYS) if key in held)
+        for held, _, _ in steps
+    ]
+    np.savez_compressed(
+        path,
+        keys=np.array(keys, dtype=np.uint8),
+        turns=np.array([turn for _, turn, _ in steps], dtype=np.int16),
+        clicks=np.array([clicked for _, _, clicked in steps], dtype=np.bool_),
+        tick_rate=tick_rate,
+    )
+
+
+def load_demo(path):
+    with np.load(path) as demo:
+        if not len(demo["keys"]):
+            raise ValueError(f"{path}: the demo has no ticks to play")
+        steps = [
+            (
+                tuple(key for bit, key in enumerate(CONTROL_KEYS) if mask >> bit & 1),
+                int(turn),
+                bool(clicked),
+            )
+            for mask, turn, clicked in zip(demo["keys"], demo["turns"], demo["clicks"])
+        ]
+        return steps, int(demo["tick_rate"])
+
+
+def wander(ticks, seed=0):
+    # walk forward turning now and then, strafing and shooting at random
+    rng = random.Random(seed)
+    steps = []
+    turn = 0
+    for tick in range(ticks):
+        if tick % 30 == 0:
+            turn = rng.choice((-20, -8, 0, 0, 8, 20))
+        keys = [pygame.K_w]
+        if rng.random() < 0.1:
+            keys.append(rng.choice((pygame.K_a, pygame.K_d)))
+        steps.append((tuple(keys), turn, rng.random() < 0.02))
+    return steps
@@ -0,0 +1,73 @@
+import argparse
+import json
+import sys
+import time
+
+from game.assets import assets
+from game.config import *
+from game.controls import ScriptedInput, wander
+from game.logic import Logic
+from game.player import Player
+from game.sprite import SpriteSet
+
+
+def simulation_tick(player, logic):
+    # one tick of the main loop without drawing
+    player.movement()
+    return logic.tick()
+
+
+def simulate(controls, ticks):
+    # no display, audio nor UI: surfaces are decoded but never converted
+    assets.convert = False
+    sprites = SpriteSet()
+    player = Player(sprites, controls)
+    logic = Logic(player, sprites, None)
+    enemies = sprites.live_enemies
+    doors = int(sprites.door_grid.sum())
+
+    start = time.perf_counter()
+    won = simulation_tick(player, logic)
+    first_tick = time.perf_counter() - start
+    tick = 1
+    start = time.perf_counter()
+    while tick < ticks and not won:
+        won = simulation_tick(player, logic)
+        tick += 1
+    seconds = time.perf_counter() - start
+    ticks_per_second = (tick - 1) / seconds if seconds else float("inf")
+    return {
+        "ticks": tick,
+        "game_seconds": tick / TICK_RATE,
+        "first_tick": first_tick,
+        "ticks_per_second": ticks_per_second,
+        "real_time_factor": ticks_per_second / TICK_RATE,
+        "won": won,
+        "live_enemies": sprites.live_enemies,
+        "enemies_killed": enemies - sprites.live_enemies,
+        "doors_opened": doors - int(sprites.door_grid.sum()),
+        "shots": player.weapon.shots,
+        "objects": sprites.count,
+        "player": {"x": player.x, "y": player.y, "angle": player.angle},
+        "los_cache": logic.sight.stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m game.headless",
+        description="Run the game logic from scripted input without a display",
+    )
+    parser.add_argument(
+        "--ticks", type=int, default=600 * TICK_RATE, help="ticks to run at most"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the script")
+    args = parser.parse_args()
+
+    report = simulate(ScriptedInput(wander(args.ticks, args.seed)), args.ticks)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
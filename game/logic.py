@@ -1,11 +1,13 @@
 import math
+import numpy as np
 import pygame
 
 # Acceleration
-from numba import njit
+from numba import njit, prange
 
+from game.cache import LineOfSightCache
 from game.config import *
-from game.map import WORLD_MAP
+from game.map import GRID_MAP
 from game.raycaster import mapping
 
 
@@ -14,72 +16,114 @@ class Logic:
         self.player = player
         self.sprites = sprites
         self.ui = ui
-        self.pain_sound = pygame.mixer.Sound("./game/sound/pain.wav")
+        # no sound when simulated without audio
+        self.pain_sound = (
+            pygame.mixer.Sound("./game/sound/pain.wav")
+            if pygame.mixer.get_init()
+            else None
+        )
+        self.sight = LineOfSightCache(GRID_MAP.shape)
+        self.cast = (
+            enemies_line_of_sight_parallel if LOS_PARALLEL else enemies_line_of_sight
+        )
+
+    def line_of_sight(self, slots):
+        # visibility of the player from the enemies in slots for enemy_action,
+        # one batched cast; results are reused while the enemy and the player
+        # stay on their tiles and no door opens, the map itself is static.
+        # Shots cast exactly with in_sight
+        player_x, player_y = float(self.player.x), float(self.player.y)
+        memo = self.sight.memo(
+            (int(player_x // TILE), int(player_y // TILE)), self.sprites.door_version
+        )
+        visible = np.zeros(len(slots), dtype=np.bool_)
+        casts = self.cast(
+            self.sprites.positions,
+            slots,
+            player_x,
+            player_y,
+            GRID_MAP,
+            self.sprites.door_grid,
+            memo,
+            visible,
+        )
+        self.sight.record(len(slots), casts)
+        return visible
+
+    def tick(self):
+        # one simulation tick of the world once the player moved, the same in
+        # the game and the headless simulation; returns whether the level is won
+        self.sprites.project(self.player)
+        self.interaction_objects()
+        self.enemy_action()
+        self.sprites.tick()
+        self.player.weapon.tick()
+        self.clear_world()
+        return self.check_win()
+
+    def in_sight(self, obj):
+        # exact cast from where obj and the player stand, for the shots; at
+        # most one per click, so it skips the tile memo of line_of_sight
+        return line_of_sight(
+            float(obj.x),
+            float(obj.y),
+            float(self.player.x),
+            float(self.player.y),
+            GRID_MAP,
+            self.sprites.door_grid,
+        )
 
     def interaction_objects(self):
-        if self.player.shot and self.ui.shot_animation_trigger:
+        weapon = self.player.weapon
+        if self.player.shot and weapon.shot_animation_trigger:
             for obj in sorted(
-                self.sprites.list_of_objects, key=lambda obj: obj.distance_to_sprite
+                self.sprites.objects_on_fire(self.player),
+                key=lambda obj: obj.distance_to_sprite,
             ):
                 if obj.is_on_fire[1]:
                     if obj.is_dead != "immortal" and not obj.is_dead:
-                        if ray_casting_enemy_player(
-                            obj.x,
-                            obj.y,
-                            self.sprites.blocked_doors,
-                            WORLD_MAP,
-                            self.player.position,
-                        ):
-                            if obj.flag == "enemy":
+                        if self.in_sight(obj):
+                            if obj.flag == "enemy" and self.pain_sound:
                                 self.pain_sound.play()
-                            obj.is_dead = True
-                            obj.blocked = None
-                            self.ui.shot_animation_trigger = False
+                            self.sprites.kill(obj)
+                            weapon.shot_animation_trigger = False
                     if (
                         obj.flag == "door_h" or obj.flag == "door_v"
                     ) and obj.distance_to_sprite < TILE:
-                        obj.door_open_trigger = True
-                        obj.blocked = None
+                        self.sprites.open_door(obj)
                     break
 
     def enemy_action(self):
-        for obj in self.sprites.list_of_objects:
-            if obj.flag == "enemy" and not obj.is_dead:
-                if ray_casting_enemy_player(
-                    obj.x,
-                    obj.y,
-                    self.sprites.blocked_doors,
-                    WORLD_MAP,
-                    self.player.position,
-                ):
-                    obj.enemy_action_trigger = True
-                    self.enemy_move(obj)
-                else:
-                    obj.enemy_action_trigger = False
-
-    def enemy_move(self, obj):
-        if abs(obj.distance_to_sprite) > TILE:
-            dx = obj.x - self.player.position[0]
-            dy = obj.y - self.player.position[1]
-            obj.x = obj.x + 1 if dx < 0 else obj.x - 1
-            obj.y = obj.y + 1 if dy < 0 else obj.y - 1
+        sprites = self.sprites
+        slots = sprites.live_enemy_slots()
+        visible = self.line_of_sight(slots)
+        # only the enemies that saw the player appear or disappear are touched
+        changed = np.flatnonzero(visible != sprites.sighted[slots])
+        for slot, seen in zip(slots[changed].tolist(), visible[changed].tolist()):
+            sprites.slots[slot].enemy_action_trigger = seen
+        sprites.sighted[slots] = visible
+        self.enemy_move(slots[visible])
+
+    def enemy_move(self, slots):
+        # one step towards the player for the enemies further than a tile
+        sprites = self.sprites
+        slots = slots[np.abs(sprites.distances[slots]) > TILE]
+        positions = sprites.positions[slots]
+        tiles = positions // TILE
+        positions += np.where(positions < self.player.position, 1, -1)
+        sprites.positions[slots] = positions
+        for slot in slots[(positions // TILE != tiles).any(axis=1)].tolist():
+            sprites.index.move(sprites.slots[slot])
 
     def clear_world(self):
-        deleted_objects = self.sprites.list_of_objects[:]
-        [
-            self.sprites.list_of_objects.remove(obj)
-            for obj in deleted_objects
-            if obj.delete
-        ]
+        if self.sprites.deleted:
+            self.sprites.clear_deleted()
 
     def check_win(self):
-        if not len(
-            [
-                obj
-                for obj in self.sprites.list_of_objects
-                if obj.flag == "enemy" and not obj.is_dead
-            ]
-        ):
+        # without a UI only reports the win, the game shows it until quit
+        if self.sprites.live_enemies:
+            return False
+        if self.ui is not None:
             pygame.mixer.music.stop()
             pygame.mixer.music.load("./game/sound/win.wav")
             pygame.mixer.music.play()
@@ -88,6 +132,112 @@ class Logic:
                     if event.type == pygame.QUIT:
                         exit()
                 self.ui.win()
+        return True
+
+
+@njit(fastmath=True, cache=True)
+def blocks_sight(x, y, grid_map, door_grid):
+    i, j = int(x // TILE), int(y // TILE)
+    if 0 <= i < grid_map.shape[1] and 0 <= j < grid_map.shape[0]:
+        return grid_map[j, i] != 0 or door_grid[j, i] != 0
+    return False
+
+
+@njit(fastmath=True, cache=True)
+def line_of_sight(enemy_x, enemy_y, player_x, player_y, grid_map, door_grid):
+    # ray_casting_enemy_player over the tile grid and the door grid
+    ox, oy = player_x, player_y
+    xm, ym = mapping(ox, oy)
+    delta_x, delta_y = ox - enemy_x, oy - enemy_y
+    angle = math.atan2(delta_y, delta_x)
+    angle += math.pi
+
+    sin_a = math.sin(angle)
+    cos_a = math.cos(angle)
+
+    # verticals
+    x, dx = (xm + TILE, 1) if cos_a >= 0 else (xm, -1)
+    for i in range(int(abs(delta_x) // TILE)):
+        depth_v = (x - ox) / cos_a
+        yv = oy + depth_v * sin_a
+        if blocks_sight(x + dx, yv, grid_map, door_grid):
+            return False
+        x += dx * TILE
+
+    # horizontals
+    y, dy = (ym + TILE, 1) if sin_a >= 0 else (ym, -1)
+    for i in range(int(abs(delta_y) // TILE)):
+        depth_h = (y - oy) / sin_a
+        xh = ox + depth_h * cos_a
+        if blocks_sight(xh, y + dy, grid_map, door_grid):
+            return False
+        y += dy * TILE
+
+    return True
+
+
+@njit(fastmath=True, cache=True)
+def enemies_line_of_sight(
+    positions, slots, player_x, player_y, grid_map, door_grid, memo, visible
+):
+    # memo: result per enemy tile for this player tile, -1 when not cast yet;
+    # returns the number of casts
+    casts = 0
+    for k in range(slots.shape[0]):
+        x, y = positions[slots[k], 0], positions[slots[k], 1]
+        i, j = int(x // TILE), int(y // TILE)
+        inside = 0 <= i < memo.shape[1] and 0 <= j < memo.shape[0]
+        if inside and memo[j, i] >= 0:
+            visible[k] = memo[j, i] == 1
+            continue
+        visible[k] = line_of_sight(x, y, player_x, player_y, grid_map, door_grid)
+        casts += 1
+        if inside:
+            memo[j, i] = visible[k]
+    return casts
+
+
+@njit(fastmath=True, cache=True, parallel=True)
+def enemies_line_of_sight_parallel(
+    positions, slots, player_x, player_y, grid_map, door_grid, memo, visible
+):
+    # same result as enemies_line_of_sight: the first enemy in slot order on
+    # each tile missing from the memo is cast, those casts run in parallel
+    count = slots.shape[0]
+    tiles = np.empty((count, 2), dtype=np.int64)
+    cast = np.empty(count, dtype=np.int64)
+    casts = 0
+    for k in range(count):
+        i = int(positions[slots[k], 0] // TILE)
+        j = int(positions[slots[k], 1] // TILE)
+        tiles[k, 0], tiles[k, 1] = i, j
+        if not (0 <= i < memo.shape[1] and 0 <= j < memo.shape[0]):
+            cast[casts] = k
+            casts += 1
+        elif memo[j, i] == -1:
+            # claimed, filled in once cast
+            memo[j, i] = -2
+            cast[casts] = k
+            casts += 1
+    for n in prange(casts):
+        k = cast[n]
+        visible[k] = line_of_sight(
+            positions[slots[k], 0],
+            positions[slots[k], 1],
+            player_x,
+            player_y,
+            grid_map,
+            door_grid,
+        )
+    for k in range(count):
+        i, j = tiles[k, 0], tiles[k, 1]
+        if not (0 <= i < memo.shape[1] and 0 <= j < memo.shape[0]):
+            continue
+        if memo[j, i] == -2:
+            memo[j, i] = visible[k]
+        else:
+            visible[k] = memo[j, i] == 1
+    return casts
 
 
 @njit(fastmath=True, cache=True)
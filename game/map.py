@@ -1,10 +1,29 @@
 # For accelerated math calculations via numba
 from numba.core import types
 from numba.typed import Dict
-from numba import int32
+from numba import int32, njit
 
 from game.config import *
+import numpy as np
 import pygame
+import time
+
+WORLD_MAP_KEY = types.UniTuple(int32, 2)
+
+
+@njit(cache=True)
+def build_world_map(grid_map):
+    # filled in compiled code: inserting from Python compiles the typed Dict
+    # methods again on every launch
+    world_map = Dict.empty(key_type=WORLD_MAP_KEY, value_type=int32)
+    for y in range(grid_map.shape[0]):
+        for x in range(grid_map.shape[1]):
+            if 1 <= grid_map[y, x] <= 4:
+                world_map[(int32(x * TILE), int32(y * TILE))] = grid_map[y, x]
+    return world_map
+
+
+build_started = time.perf_counter()
 
 MATRIX_MAP = []
 MINIMAP = set()
@@ -20,18 +39,17 @@ WORLD_WIDTH, WORLD_HEIGHT = (
     max([len(i) for i in MATRIX_MAP]) * TILE,
     len(MATRIX_MAP) * TILE,
 )
-WORLD_MAP = Dict.empty(key_type=types.UniTuple(int32, 2), value_type=int32)
 
+# Dense tile grid (row, column) for the DDA ray caster, 0 means empty
+GRID_MAP = np.zeros(
+    (WORLD_HEIGHT // TILE, WORLD_WIDTH // TILE), dtype=np.int32
+)
 for y, row in enumerate(MATRIX_MAP):
     for x, char in enumerate(row):
         if char:
             MINIMAP.add((x * MAP_TILE, y * MAP_TILE))
             WORLD_WALLS.append(pygame.Rect(x * TILE, y * TILE, TILE, TILE))
-            if char == 1:
-                WORLD_MAP[(x * TILE, y * TILE)] = 1
-            elif char == 2:
-                WORLD_MAP[(x * TILE, y * TILE)] = 2
-            elif char == 3:
-                WORLD_MAP[(x * TILE, y * TILE)] = 3
-            elif char == 4:
-                WORLD_MAP[(x * TILE, y * TILE)] = 4
+            GRID_MAP[y, x] = char
+
+WORLD_MAP = build_world_map(GRID_MAP)
+MAP_BUILD_TIME = time.perf_counter() - build_started
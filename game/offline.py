@@ -0,0 +1,168 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+# must be set before pygame is imported, the workers draw off screen
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from game.config import *
+from game.player import Player
+from game.raycaster import caster, ray_casting_walls
+from game.renderer import FrameBufferRenderer
+from game.sprite import SpriteSet
+from game.timeline import Timeline
+from game.ui import UI
+
+FRAME_BYTES = WIDTH * HEIGHT * 3
+
+
+class SessionRenderer:
+    # draws the frames of a recorded timeline the way the game loop does
+    def __init__(self, timeline, renderer="columns"):
+        pygame.init()
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        self.timeline = timeline
+        self.sprites = SpriteSet()
+        # the player is the camera, posed from the timeline
+        self.player = Player(self.sprites)
+        self.ui = UI(
+            self.screen,
+            pygame.Surface(MAP_RESOLUTION),
+            self.player,
+            pygame.time.Clock(),
+        )
+        self.frame_buffer = (
+            FrameBufferRenderer(self.screen, self.ui.textures)
+            if renderer == "framebuffer"
+            else None
+        )
+
+    def draw(self, frame):
+        player = self.player
+        player.x, player.y, player.angle = self.timeline.restore(
+            frame, self.sprites, player
+        )
+        if self.frame_buffer:
+            wall_shot = self.frame_buffer.draw(player)
+            walls, depth_buffer = [], caster.depths
+        else:
+            self.ui.background()
+            walls, wall_shot = ray_casting_walls(player, self.ui.wall_textures)
+            depth_buffer = None
+        located = self.sprites.locate(player, caster.depths, caster.heights)
+        self.ui.world(walls + located, depth_buffer)
+        self.ui.mini_map()
+        self.ui.player_weapon([wall_shot, self.sprites.sprite_shot(player)])
+        return self.screen
+
+
+# per worker process: renderer and where the frames go
+session = None
+
+
+def start_worker(path, renderer, output, frame_format, first):
+    global session
+    session = (
+        SessionRenderer(Timeline.load(path), renderer),
+        output,
+        frame_format,
+        first,
+    )
+
+
+def render_range(frames):
+    renderer, output, frame_format, first = session
+    if frame_format == "raw":
+        stream = os.open(output, os.O_WRONLY)
+    for frame in range(*frames):
+        screen = renderer.draw(frame)
+        if frame_format == "raw":
+            os.pwrite(
+                stream,
+                pygame.image.tobytes(screen, "RGB"),
+                (frame - first) * FRAME_BYTES,
+            )
+        else:
+            pygame.image.save(screen, os.path.join(output, f"{frame:06d}.png"))
+    if frame_format == "raw":
+        os.close(stream)
+    return frames[1] - frames[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m game.offline",
+        description="Render a recorded timeline to images on several processes",
+    )
+    parser.add_argument("timeline", help="timeline recorded with main.py --record")
+    parser.add_argument(
+        "--output",
+        default="frames",
+        help="directory of numbered PNGs, or the file of the raw stream",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("png", "raw"),
+        default="png",
+        help=f"numbered PNGs or one stream of {WIDTH}x{HEIGHT} RGB24 frames",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--chunk", type=int, default=32, help="consecutive frames per task"
+    )
+    parser.add_argument(
+        "--renderer", choices=("columns", "framebuffer"), default=RENDERER
+    )
+    parser.add_argument("--start", type=int, default=0, help="first frame")
+    parser.add_argument("--end", type=int, help="frame to stop before")
+    args = parser.parse_args()
+
+    with np.load(args.timeline) as data:
+        count = len(data["times"])
+    end = count if args.end is None else min(args.end, count)
+    ranges = [
+        (start, min(start + args.chunk, end))
+        for start in range(args.start, end, args.chunk)
+    ]
+    if args.format == "raw":
+        with open(args.output, "wb") as stream:
+            stream.truncate(max(end - args.start, 0) * FRAME_BYTES)
+    else:
+        os.makedirs(args.output, exist_ok=True)
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(
+        args.workers,
+        initializer=start_worker,
+        initargs=(
+            args.timeline,
+            args.renderer,
+            args.output,
+            args.format,
+            args.start,
+        ),
+    ) as pool:
+        frames = sum(pool.imap_unordered(render_range, ranges))
+        # let the workers exit, pygame keeps them from dying on terminate()
+        pool.close()
+        pool.join()
+    seconds = time.perf_counter() - started
+    report = {
+        "frames": frames,
+        "workers": args.workers,
+        "seconds": seconds,
+        "frames_per_second": frames / seconds if seconds else float("inf"),
+        "output": args.output,
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
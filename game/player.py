@@ -1,32 +1,51 @@
-from game.map import WORLD_WALLS
+from game.controls import LiveInput
+from game.map import GRID_MAP
 from game.config import *
+from game.weapon import Weapon
 import pygame
 import math
 
 
 class Player:
-    def __init__(self, sprites):
+    def __init__(self, sprites, controls=None):
         self.x, self.y = PLAYER_POSITION
         self.angle = PLAYER_ANGLE
         self.sensitivity = PLAYER_SENSITIVITY
         self.sprites = sprites
         # collision params
+        self.grid = GRID_MAP
         self.side = 50
         self.rect = pygame.Rect(*PLAYER_POSITION, self.side, self.side)
+        # keyboard and mouse, or a script of them
+        self.controls = LiveInput() if controls is None else controls
         # weapon
         self.shot = False
+        self.weapon = Weapon(self)
+        # stats overlay
+        self.show_stats = False
 
     @property
     def position(self):
         return (self.x, self.y)
 
-    @property
-    def collision_list(self):
-        return WORLD_WALLS + [
+    def collision_list(self, rect):
+        # wall tiles overlapped by rect, plus blocking sprites around them
+        rows, columns = self.grid.shape
+        i0, j0 = max(rect.left // TILE, 0), max(rect.top // TILE, 0)
+        i1 = min((rect.right - 1) // TILE, columns - 1)
+        j1 = min((rect.bottom - 1) // TILE, rows - 1)
+        collision_list = [
+            pygame.Rect(i * TILE, j * TILE, TILE, TILE)
+            for j in range(j0, j1 + 1)
+            for i in range(i0, i1 + 1)
+            if self.grid[j, i]
+        ]
+        collision_list += [
             pygame.Rect(*obj.position, obj.side, obj.side)
-            for obj in self.sprites.list_of_objects
+            for obj in self.sprites.index.query_tiles(i0 - 1, j0 - 1, i1 + 1, j1 + 1)
             if obj.blocked
         ]
+        return collision_list
 
     def movement(self):
         self.keys_control()
@@ -38,7 +57,7 @@ class Player:
         sin_a = math.sin(self.angle)
         cos_a = math.cos(self.angle)
 
-        keys = pygame.key.get_pressed()
+        keys = self.controls.pressed()
         if keys[pygame.K_ESCAPE]:
             exit()
         if keys[pygame.K_w]:
@@ -59,28 +78,28 @@ class Player:
         if keys[pygame.K_RIGHT]:
             self.angle += PLAYER_ROTATION_SPEED
 
-        for event in pygame.event.get():
+        for event in self.controls.events():
             if event.type == pygame.QUIT:
                 exit()
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1 and not self.shot:
                     self.shot = True
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.show_stats = not self.show_stats
 
     def mouse_control(self):
-        if pygame.mouse.get_focused():
-            difference = pygame.mouse.get_pos()[0] - HALF_WIDTH
-            pygame.mouse.set_pos([HALF_WIDTH, HALF_HEIGHT])
-            self.angle += difference * self.sensitivity
+        self.angle += self.controls.turn() * self.sensitivity
 
     def find_collision(self, dx, dy):
         next_rect = self.rect.copy()
         next_rect.move_ip(dx, dy)
-        hit_indexes = next_rect.collidelistall(self.collision_list)
+        collision_list = self.collision_list(next_rect)
+        hit_indexes = next_rect.collidelistall(collision_list)
 
         if len(hit_indexes):
             delta_x, delta_y = 0, 0
             for hit_index in hit_indexes:
-                hit_rect = self.collision_list[hit_index]
+                hit_rect = collision_list[hit_index]
                 if dx > 0:
                     delta_x += next_rect.right - hit_rect.left
                 else:
@@ -0,0 +1,151 @@
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+from game.config import *
+
+PROFILER_COLORS = (
+    (0, 190, 255),
+    (116, 0, 116),
+    (220, 0, 0),
+    (252, 138, 0),
+    (222, 222, 0),
+    (0, 160, 0),
+    (242, 162, 94),
+    (0, 0, 220),
+    (255, 255, 255),
+    (120, 120, 120),
+)
+
+
+class FrameProfiler:
+    def __init__(self, phases=PROFILER_PHASES, capacity=PROFILER_FRAMES):
+        self.phases = phases
+        self.phase_index = {phase: i for i, phase in enumerate(phases)}
+        self.capacity = capacity
+        # ring buffer of per-frame phase durations and frame start times (s)
+        self.timings = np.zeros((capacity, len(phases)), dtype=np.float64)
+        self.starts = np.zeros(capacity, dtype=np.float64)
+        self.frames = 0
+        self.row = 0
+        self.last = time.perf_counter()
+        self.origin = self.last
+
+        # overlay
+        self.graph = pygame.Surface(PROFILER_GRAPH_SIZE)
+        self.graph_rows = np.arange(PROFILER_GRAPH_SIZE[1])[::-1]
+        self.palette = None
+        self.font = None
+        self.legend = None
+
+    def begin_frame(self):
+        self.row = self.frames % self.capacity
+        self.timings[self.row] = 0
+        self.last = time.perf_counter()
+        self.starts[self.row] = self.last
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.timings[self.row, self.phase_index[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        self.frames += 1
+
+    def recorded(self):
+        # frames still in the ring buffer, oldest first
+        if self.frames <= self.capacity:
+            return self.starts[: self.frames], self.timings[: self.frames]
+        order = np.roll(np.arange(self.capacity), -(self.frames % self.capacity))
+        return self.starts[order], self.timings[order]
+
+    def draw(self, screen, stats=()):
+        if self.palette is None:
+            colors = [
+                PROFILER_COLORS[i % len(PROFILER_COLORS)]
+                for i in range(len(self.phases))
+            ]
+            self.palette = np.array([self.graph.map_rgb(c) for c in colors + [BLACK]])
+            self.font = pygame.font.SysFont("Arial", 14, bold=True)
+            self.legend = [
+                self.font.render(phase, 0, PROFILER_COLORS[i % len(PROFILER_COLORS)])
+                for i, phase in enumerate(self.phases)
+            ]
+
+        width, height = PROFILER_GRAPH_SIZE
+        _, timings = self.recorded()
+        timings = timings[-width:]
+        stacked = np.cumsum(timings, axis=1) * 1e3 * height / PROFILER_GRAPH_MS
+        # phase of every graph pixel, len(phases) above the stacked bar
+        phases = (self.graph_rows[None, :, None] >= stacked[:, None, :]).sum(axis=2)
+        pixels = np.full((width, height), self.palette[-1])
+        pixels[width - len(timings) :] = self.palette[phases]
+        # frame budget line
+        budget = height - 1 - int(1000 / FPS * height / PROFILER_GRAPH_MS)
+        if budget >= 0:
+            pixels[:, budget] = self.graph.map_rgb(WHITE)
+        pygame.surfarray.blit_array(self.graph, pixels)
+        screen.blit(self.graph, FPS_POSITION)
+
+        x, y = FPS_POSITION[0] + width + 5, FPS_POSITION[1]
+        for label in self.legend:
+            screen.blit(label, (x, y))
+            y += label.get_height()
+
+        x, y = FPS_POSITION[0], FPS_POSITION[1] + height + 5
+        for line in stats:
+            label = self.font.render(line, 0, WHITE)
+            screen.blit(label, (x, y))
+            y += label.get_height()
+
+    def export_csv(self, path):
+        starts, timings = self.recorded()
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", "start_ms", *self.phases, "total_ms"])
+            first = self.frames - len(starts)
+            for n, (start, row) in enumerate(zip(starts, timings)):
+                writer.writerow(
+                    [first + n, round((start - self.origin) * 1e3, 3)]
+                    + [round(value * 1e3, 3) for value in row]
+                    + [round(row.sum() * 1e3, 3)]
+                )
+
+    def export_trace(self, path):
+        # Chrome trace-event format, open in chrome://tracing or Perfetto
+        starts, timings = self.recorded()
+        events = []
+        first = self.frames - len(starts)
+        for n, (start, row) in enumerate(zip(starts, timings)):
+            timestamp = (start - self.origin) * 1e6
+            events.append(
+                {
+                    "name": "frame",
+                    "ph": "X",
+                    "ts": timestamp,
+                    "dur": row.sum() * 1e6,
+                    "pid": 0,
+                    "tid": 0,
+                    "args": {"frame": first + n},
+                }
+            )
+            for phase, duration in zip(self.phases, row):
+                events.append(
+                    {
+                        "name": phase,
+                        "ph": "X",
+                        "ts": timestamp,
+                        "dur": duration * 1e6,
+                        "pid": 0,
+                        "tid": 1,
+                    }
+                )
+                timestamp += duration * 1e6
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def export(self, prefix):
+        self.export_csv(prefix + ".csv")
+        self.export_trace(prefix + ".json")
@@ -1,7 +1,9 @@
+import numpy as np
 import pygame
 from game.config import *
-from game.map import WORLD_MAP, WORLD_WIDTH, WORLD_HEIGHT
-from numba import njit
+from game.map import GRID_MAP, WORLD_MAP, WORLD_WIDTH, WORLD_HEIGHT
+import numba
+from numba import njit, prange
 
 
 @njit(fastmath=True, cache=True)
@@ -58,31 +60,213 @@ def ray_casting(player_position, player_angle, world_map):
     return casted_walls
 
 
+@njit(fastmath=True, cache=True)
+def cast_ray(ox, oy, xm, ym, current_angle, grid_map):
+    # depth, texture offset and texture of the first wall hit by one ray
+    rows, columns = grid_map.shape
+    sin_a = math.sin(current_angle)
+    cos_a = math.cos(current_angle)
+    if abs(cos_a) < 1e-9:
+        cos_a = 1e-9
+    if abs(sin_a) < 1e-9:
+        sin_a = 1e-9
+
+    # next vertical and horizontal grid lines crossed by the ray
+    x, dx = (xm + TILE, 1) if cos_a >= 0 else (xm, -1)
+    y, dy = (ym + TILE, 1) if sin_a >= 0 else (ym, -1)
+    depth_v = (x - ox) / cos_a
+    depth_h = (y - oy) / sin_a
+
+    # single traversal, always stepping to the nearest grid line
+    depth, offset, texture = depth_h, ox, 1
+    for step in range(rows + columns):
+        if depth_v < depth_h:
+            yv = oy + depth_v * sin_a
+            i, j = int((x + dx) // TILE), int(yv // TILE)
+            depth, offset = depth_v, yv
+            if not (0 <= i < columns and 0 <= j < rows):
+                break
+            if grid_map[j, i]:
+                texture = grid_map[j, i]
+                break
+            x += dx * TILE
+            depth_v = (x - ox) / cos_a
+        else:
+            xh = ox + depth_h * cos_a
+            i, j = int(xh // TILE), int((y + dy) // TILE)
+            depth, offset = depth_h, xh
+            if not (0 <= i < columns and 0 <= j < rows):
+                break
+            if grid_map[j, i]:
+                texture = grid_map[j, i]
+                break
+            y += dy * TILE
+            depth_h = (y - oy) / sin_a
+    return depth, offset, texture
+
+
+@njit(fastmath=True, cache=True)
+def ray_casting_dda(
+    player_position,
+    player_angle,
+    grid_map,
+    ray_offsets,
+    ray_cosines,
+    projection_coefficient,
+    depths,
+    offsets,
+    heights,
+    textures,
+):
+    ox, oy = player_position
+    xm, ym = mapping(ox, oy)
+    for ray in range(ray_offsets.shape[0]):
+        depth, offset, texture = cast_ray(
+            ox, oy, xm, ym, player_angle + ray_offsets[ray], grid_map
+        )
+
+        # projection
+        depth *= ray_cosines[ray]
+        depth = max(depth, 0.00001)
+        depths[ray] = depth
+        offsets[ray] = int(offset) % TILE
+        heights[ray] = int(projection_coefficient / depth)
+        textures[ray] = texture
+
+
+@njit(fastmath=True, cache=True, parallel=True, nogil=True)
+def ray_casting_dda_parallel(
+    player_position,
+    player_angle,
+    grid_map,
+    ray_offsets,
+    ray_cosines,
+    projection_coefficient,
+    depths,
+    offsets,
+    heights,
+    textures,
+):
+    # ray_casting_dda with the rays split in chunks over the numba threads,
+    # every ray only writes its own slot of the outputs
+    ox, oy = player_position
+    xm, ym = mapping(ox, oy)
+    for ray in prange(ray_offsets.shape[0]):
+        depth, offset, texture = cast_ray(
+            ox, oy, xm, ym, player_angle + ray_offsets[ray], grid_map
+        )
+
+        # projection
+        depth *= ray_cosines[ray]
+        depth = max(depth, 0.00001)
+        depths[ray] = depth
+        offsets[ray] = int(offset) % TILE
+        heights[ray] = int(projection_coefficient / depth)
+        textures[ray] = texture
+
+
+class RayCaster:
+    def __init__(self, num_rays=NUM_RAYS, threads=RAY_CASTING_THREADS):
+        self.resize(num_rays)
+        self.set_threads(threads)
+
+    def set_threads(self, threads):
+        # more than one thread casts with the parallel kernel on the numba
+        # thread pool, capped at its size; the count only applies to the wall
+        # cast, see cast
+        self.threads = min(max(threads, 1), numba.config.NUMBA_NUM_THREADS)
+        if self.threads > 1:
+            self.kernel = ray_casting_dda_parallel
+        else:
+            self.kernel = ray_casting_dda
+
+    def resize(self, num_rays):
+        self.num_rays = num_rays
+        self.delta_angle = FOV / num_rays
+        # wall heights are in screen pixels, whatever the number of rays
+        self.projection_coefficient = PROJECTION_COEFFICIENT
+        self.center_ray = num_rays // 2 - 1
+        # screen x and width of each ray column
+        edges = [ray * WIDTH // num_rays for ray in range(num_rays + 1)]
+        self.columns = [(x, next_x - x) for x, next_x in zip(edges, edges[1:])]
+        # per-ray tables, computed once
+        self.ray_offsets = -HALF_FOV + np.arange(num_rays) * self.delta_angle
+        self.ray_cosines = np.cos(self.ray_offsets)
+        # output buffers, reused every frame
+        self.depths = np.zeros(num_rays, dtype=np.float64)
+        self.offsets = np.zeros(num_rays, dtype=np.int32)
+        self.heights = np.zeros(num_rays, dtype=np.int64)
+        self.textures = np.ones(num_rays, dtype=np.int32)
+
+    def cast(self, player):
+        if self.threads > 1:
+            # the thread count is set around the call, other parallel kernels
+            # (LOS_PARALLEL) keep their own
+            threads = numba.get_num_threads()
+            numba.set_num_threads(self.threads)
+            try:
+                self.run(player)
+            finally:
+                numba.set_num_threads(threads)
+        else:
+            self.run(player)
+
+    def run(self, player):
+        self.kernel(
+            (float(player.x), float(player.y)),
+            float(player.angle),
+            GRID_MAP,
+            self.ray_offsets,
+            self.ray_cosines,
+            self.projection_coefficient,
+            self.depths,
+            self.offsets,
+            self.heights,
+            self.textures,
+        )
+
+    @property
+    def casted_walls(self):
+        return zip(
+            self.depths.tolist(),
+            self.offsets.tolist(),
+            self.heights.tolist(),
+            self.textures.tolist(),
+        )
+
+    @property
+    def wall_shot(self):
+        return (
+            float(self.depths[self.center_ray]),
+            int(self.heights[self.center_ray]),
+        )
+
+
+caster = RayCaster()
+
+
 def ray_casting_walls(player, textures):
     walls = []
-    casted_walls = ray_casting(player.position, player.angle, WORLD_MAP)
-    wall_shot = casted_walls[CENTER_RAY][0], casted_walls[CENTER_RAY][2]
+    caster.cast(player)
+    wall_shot = caster.wall_shot
 
-    for ray, casted_values in enumerate(casted_walls):
+    for (column_x, scale), casted_values in zip(caster.columns, caster.casted_walls):
         depth, offset, projection_height, texture = casted_values
+        strip = textures.strip(texture, offset, projection_height)
         if projection_height > HEIGHT:
-            texture_height = TEXTURE_HEIGHT / (projection_height / HEIGHT)
-            wall_column = textures[texture].subsurface(
-                offset * TEXTURE_SCALE,
-                HALF_TEXTURE_HEIGHT - texture_height // 2,
-                TEXTURE_SCALE,
+            strip_height = strip.get_height()
+            texture_height = strip_height / (projection_height / HEIGHT)
+            wall_column = strip.subsurface(
+                0,
+                strip_height // 2 - texture_height // 2,
+                strip.get_width(),
                 texture_height,
             )
-            wall_column = pygame.transform.scale(wall_column, (SCALE, HEIGHT))
-            wall_position = (ray * SCALE, 0)
+            wall_column = pygame.transform.scale(wall_column, (scale, HEIGHT))
+            wall_position = (column_x, 0)
         else:
-            wall_column = textures[texture].subsurface(
-                offset * TEXTURE_SCALE, 0, TEXTURE_SCALE, TEXTURE_HEIGHT
-            )
-            wall_column = pygame.transform.scale(
-                wall_column, (SCALE, projection_height)
-            )
-            wall_position = (ray * SCALE, HALF_HEIGHT - projection_height // 2)
+            wall_column = pygame.transform.scale(strip, (scale, projection_height))
+            wall_position = (column_x, HALF_HEIGHT - projection_height // 2)
 
         walls.append((depth, wall_column, wall_position))
     return walls, wall_shot
@@ -0,0 +1,146 @@
+import numpy as np
+import pygame
+from game.config import *
+from game.raycaster import caster
+from numba import njit
+
+
+@njit(fastmath=True, cache=True)
+def plane_casting(
+    player_position,
+    player_angle,
+    ray_tangents,
+    row_distances,
+    heights,
+    texture,
+    pixels,
+    floor,
+):
+    # square texture with a power of two side, so wrapping is a bit mask
+    size = texture.shape[0]
+    wrap = size - 1
+    scale = size / TILE
+    ox, oy = player_position[0] * scale, player_position[1] * scale
+    sin_a = math.sin(player_angle)
+    cos_a = math.cos(player_angle)
+    for ray in range(pixels.shape[0]):
+        # ray direction scaled so that distance * direction is the floor point
+        # at that perpendicular distance
+        dir_x = (cos_a - sin_a * ray_tangents[ray]) * scale
+        dir_y = (sin_a + cos_a * ray_tangents[ray]) * scale
+        # skip the rows covered by the wall
+        first = heights[ray] - heights[ray] // 2 if floor else heights[ray] // 2
+        for k in range(max(first, 0), row_distances.shape[0]):
+            distance = row_distances[k]
+            x = int(math.floor(ox + distance * dir_x)) & wrap
+            y = int(math.floor(oy + distance * dir_y)) & wrap
+            row = HALF_HEIGHT + k if floor else HALF_HEIGHT - 1 - k
+            pixels[ray, row] = texture[x, y]
+
+
+class FrameBufferRenderer:
+    def __init__(self, screen, textures):
+        self.screen = screen
+        # wall textures stacked as one flat array of mapped pixels for a single gather
+        texture_ids = sorted(key for key in textures if key != "S")
+        self.texture_index = np.zeros(max(texture_ids) + 1, dtype=np.int32)
+        for index, texture_id in enumerate(texture_ids):
+            self.texture_index[texture_id] = index
+        self.texture_stack = np.ascontiguousarray(
+            np.stack(
+                [pygame.surfarray.array2d(textures[key]) for key in texture_ids]
+            ).reshape(-1)
+        )
+        self.sky = pygame.surfarray.array2d(textures["S"])[:, :HALF_HEIGHT]
+        self.floor = self.plane_texture(textures, FLOOR_TEXTURE)
+        self.ceiling = self.plane_texture(textures, CEILING_TEXTURE)
+        self.rows = np.arange(HEIGHT, dtype=np.float32)
+        self.resize(caster.num_rays)
+
+    def plane_texture(self, textures, key):
+        if key is None:
+            return None
+        size = (PLANE_TEXTURE_SIZE, PLANE_TEXTURE_SIZE)
+        return pygame.surfarray.array2d(
+            pygame.transform.smoothscale(textures[key], size)
+        )
+
+    def resize(self, num_rays):
+        self.num_rays = num_rays
+        self.ray_columns = (np.arange(num_rays) * WIDTH) // num_rays
+        # buffers at internal resolution, reused every frame
+        self.pixels = np.zeros((num_rays, HEIGHT), dtype=self.texture_stack.dtype)
+        self.columns = np.zeros((num_rays, HEIGHT), dtype=self.texture_stack.dtype)
+        self.texture_rows = np.zeros((num_rays, HEIGHT), dtype=np.float32)
+        self.texels = np.zeros((num_rays, HEIGHT), dtype=np.int32)
+        self.mask = np.zeros((num_rays, HEIGHT), dtype=bool)
+        self.mask_bottom = np.zeros((num_rays, HEIGHT), dtype=bool)
+        self.sky_columns = np.zeros(num_rays, dtype=np.int64)
+        self.surface = pygame.Surface((num_rays, HEIGHT), 0, self.screen)
+        self.floor_color = self.surface.map_rgb(DARKGRAY)
+        # floor and ceiling tables: perpendicular distance of each row away from
+        # the horizon and the tangent of each ray angle
+        self.row_distances = caster.projection_coefficient / (
+            2 * (np.arange(HALF_HEIGHT) + 0.5)
+        )
+        self.ray_tangents = np.tan(caster.ray_offsets)
+
+    def background(self, player):
+        sky_offset = int(-10 * math.degrees(player.angle) % WIDTH)
+        np.subtract(self.ray_columns, sky_offset, out=self.sky_columns)
+        np.take(
+            self.sky,
+            self.sky_columns,
+            axis=0,
+            out=self.pixels[:, :HALF_HEIGHT],
+            mode="wrap",
+        )
+        self.pixels[:, HALF_HEIGHT:] = self.floor_color
+
+    def planes(self, player):
+        for texture, floor in ((self.floor, True), (self.ceiling, False)):
+            if texture is not None:
+                plane_casting(
+                    (float(player.x), float(player.y)),
+                    float(player.angle),
+                    self.ray_tangents,
+                    self.row_distances,
+                    caster.heights,
+                    texture,
+                    self.pixels,
+                    floor,
+                )
+
+    def walls(self):
+        heights = np.maximum(caster.heights, 1)[:, None]
+        top = (HALF_HEIGHT - heights // 2).astype(np.float32)
+
+        # texture row of every pixel, negative or past the end outside the wall
+        np.subtract(self.rows, top, out=self.texture_rows)
+        self.texture_rows *= (TEXTURE_HEIGHT / heights).astype(np.float32)
+        np.greater_equal(self.texture_rows, 0, out=self.mask)
+        np.less(self.texture_rows, TEXTURE_HEIGHT, out=self.mask_bottom)
+        self.mask &= self.mask_bottom
+        np.clip(self.texture_rows, 0, TEXTURE_HEIGHT - 1, out=self.texture_rows)
+
+        # texel index of every pixel: ((texture * width) + x) * height + y
+        np.copyto(self.texels, self.texture_rows, casting="unsafe")
+        base = (
+            self.texture_index[caster.textures] * TEXTURE_WIDTH
+            + caster.offsets * TEXTURE_SCALE
+        ) * TEXTURE_HEIGHT
+        self.texels += base[:, None].astype(np.int32)
+
+        np.take(self.texture_stack, self.texels, axis=0, out=self.columns)
+        np.copyto(self.pixels, self.columns, where=self.mask)
+
+    def draw(self, player):
+        if caster.num_rays != self.num_rays:
+            self.resize(caster.num_rays)
+        caster.cast(player)
+        self.background(player)
+        self.planes(player)
+        self.walls()
+        pygame.surfarray.blit_array(self.surface, self.pixels)
+        pygame.transform.scale(self.surface, (WIDTH, HEIGHT), self.screen)
+        return caster.wall_shot
@@ -0,0 +1,44 @@
+from collections import deque
+
+from game.config import *
+
+
+class ResolutionController:
+    def __init__(
+        self,
+        caster,
+        target_fps=RESOLUTION_TARGET_FPS,
+        ladder=RESOLUTION_LADDER,
+        window=RESOLUTION_WINDOW,
+    ):
+        self.caster = caster
+        self.ladder = sorted(ladder)
+        self.target_ms = 1000 / target_fps
+        self.frame_times = deque(maxlen=window)
+        # start from the closest ray count of the ladder
+        self.level = min(
+            range(len(self.ladder)),
+            key=lambda level: abs(self.ladder[level] - caster.num_rays),
+        )
+        self.caster.resize(self.ladder[self.level])
+
+    def update(self, frame_ms):
+        self.frame_times.append(frame_ms)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+        average_ms = sum(self.frame_times) / len(self.frame_times)
+        if average_ms > self.target_ms * RESOLUTION_DOWNSCALE_AT and self.level > 0:
+            self.level -= 1
+        elif (
+            average_ms < self.target_ms * RESOLUTION_UPSCALE_AT
+            and self.level < len(self.ladder) - 1
+        ):
+            self.level += 1
+        else:
+            return
+        self.caster.resize(self.ladder[self.level])
+        self.frame_times.clear()
+
+    @property
+    def resolution(self):
+        return f"{self.caster.num_rays}x{HEIGHT}"
@@ -0,0 +1,135 @@
+import math
+from collections import defaultdict
+
+from game.config import *
+
+
+class SpatialIndex:
+    def __init__(self, cell=TILE):
+        self.cell = cell
+        self.buckets = defaultdict(set)
+        self.cells = {}
+        self.flags = defaultdict(set)
+        # cell bounds ever occupied, to clip queries to the populated area
+        self.bounds = None
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def key(self, x, y):
+        return int(x // self.cell), int(y // self.cell)
+
+    def grow(self, key):
+        i, j = key
+        if self.bounds is None:
+            self.bounds = (i, j, i, j)
+        else:
+            i0, j0, i1, j1 = self.bounds
+            self.bounds = (min(i0, i), min(j0, j), max(i1, i), max(j1, j))
+
+    def insert(self, obj):
+        key = self.key(obj.x, obj.y)
+        self.grow(key)
+        self.buckets[key].add(obj)
+        self.cells[obj] = key
+        self.flags[obj.flag].add(obj)
+
+    def remove(self, obj):
+        key = self.cells.pop(obj, None)
+        if key is None:
+            return
+        bucket = self.buckets[key]
+        bucket.discard(obj)
+        if not bucket:
+            del self.buckets[key]
+        self.flags[obj.flag].discard(obj)
+
+    def move(self, obj):
+        key = self.key(obj.x, obj.y)
+        old_key = self.cells.get(obj)
+        if key != old_key and old_key is not None:
+            bucket = self.buckets[old_key]
+            bucket.discard(obj)
+            if not bucket:
+                del self.buckets[old_key]
+            self.grow(key)
+            self.buckets[key].add(obj)
+            self.cells[obj] = key
+
+    def by_flag(self, flag):
+        return self.flags[flag]
+
+    def query_tiles(self, i0, j0, i1, j1):
+        # objects whose center lies in the inclusive tile range
+        found = []
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.buckets):
+            for (i, j), bucket in self.buckets.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    found.extend(bucket)
+            return found
+        for j in range(j0, j1 + 1):
+            for i in range(i0, i1 + 1):
+                bucket = self.buckets.get((i, j))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def query_radius(self, x, y, radius):
+        i0, j0 = self.key(x - radius, y - radius)
+        i1, j1 = self.key(x + radius, y + radius)
+        radius_2 = radius * radius
+        return [
+            obj
+            for obj in self.query_tiles(i0, j0, i1, j1)
+            if (obj.x - x) ** 2 + (obj.y - y) ** 2 <= radius_2
+        ]
+
+    def query_ray(self, x, y, angle, max_distance, spread=0.0):
+        # objects in the cells covered by the triangle swept by a ray widened
+        # by +-spread radians, padded by one cell
+        half_width = max_distance * math.tan(min(abs(spread), math.pi / 2 - 1e-3))
+        far_x, far_y = x + max_distance * math.cos(angle), y + max_distance * math.sin(
+            angle
+        )
+        side_x, side_y = -math.sin(angle) * half_width, math.cos(angle) * half_width
+        corners = (
+            (x, y),
+            (far_x + side_x, far_y + side_y),
+            (far_x - side_x, far_y - side_y),
+        )
+        edges = list(zip(corners, corners[1:] + corners[:1]))
+
+        if self.bounds is None:
+            return []
+        min_i, min_j, max_i, max_j = self.bounds
+        spans = {}
+        j0 = max(min_j - 1, int(min(c[1] for c in corners) // self.cell))
+        j1 = min(max_j + 1, int(max(c[1] for c in corners) // self.cell))
+        for j in range(j0, j1 + 1):
+            top, bottom = j * self.cell, (j + 1) * self.cell
+            # x extent of the triangle inside this row of cells
+            xs = [cx for cx, cy in corners if top <= cy <= bottom]
+            for (ax, ay), (bx, by) in edges:
+                for row_y in (top, bottom):
+                    if ay != by and min(ay, by) <= row_y <= max(ay, by):
+                        xs.append(ax + (bx - ax) * (row_y - ay) / (by - ay))
+            if not xs:
+                continue
+            i0 = max(min_i, int(min(xs) // self.cell) - 1)
+            i1 = min(max_i, int(max(xs) // self.cell) + 1)
+            for row in (j - 1, j, j + 1):
+                span = spans.get(row)
+                spans[row] = (
+                    (i0, i1) if span is None else (min(span[0], i0), max(span[1], i1))
+                )
+
+        found = []
+        for j, (i0, i1) in spans.items():
+            for i in range(i0, i1 + 1):
+                bucket = self.buckets.get((i, j))
+                if bucket:
+                    found.extend(bucket)
+        return found
@@ -1,23 +1,164 @@
 # Math acceleration module
-from numba.core import types
-from numba.typed import Dict
-from numba import int32
+from numba import njit
 
+import numpy as np
 import pygame
-from collections import deque
+from game.assets import FrameSet, frame_sets, load_image
+from game.cache import scaled_surfaces
 from game.config import *
-from game.raycaster import mapping
+from game.map import GRID_MAP, WORLD_WIDTH, WORLD_HEIGHT
+from game.spatial import SpatialIndex
+
+
+@njit(fastmath=True, cache=True)
+def viewing_angle_frame(theta, frames):
+    if theta < 0:
+        theta += 2 * math.pi
+    theta = 360 - int(math.degrees(theta))
+    if frames == 8:
+        # 45 degree sectors, the first one centered on 0
+        if 338 <= theta <= 360 or 0 <= theta < 23:
+            return 0
+        if 23 <= theta < 338:
+            return (theta - 23) // 45 + 1
+    elif frames:
+        # 23 degree sectors, the first one centered on 0
+        if 348 <= theta <= 360 or 0 <= theta < 11:
+            return 0
+        if 11 <= theta < 348:
+            return (theta - 11) // 23 + 1
+    return -1
+
+
+@njit(fastmath=True, cache=True)
+def project_sprites(
+    player_x,
+    player_y,
+    player_angle,
+    positions,
+    active,
+    doors,
+    frames,
+    scales,
+    distances,
+    rays,
+    heights,
+    sizes,
+    frame_index,
+    visible,
+):
+    player_degrees = math.degrees(player_angle)
+    for n in range(positions.shape[0]):
+        visible[n] = False
+        if not active[n]:
+            continue
+        dx, dy = positions[n, 0] - player_x, positions[n, 1] - player_y
+        distance = math.sqrt(dx ** 2 + dy ** 2)
+
+        theta = math.atan2(dy, dx)
+        gamma = theta - player_angle
+        if dx > 0 and 180 <= player_degrees <= 360 or dx < 0 and dy < 0:
+            gamma += 2 * math.pi
+        theta -= 1.4 * gamma
+
+        current_ray = CENTER_RAY + int(gamma / DELTA_ANGLE)
+        if not doors[n]:
+            distance *= math.cos(HALF_FOV - current_ray * DELTA_ANGLE)
+        distances[n] = distance
+        rays[n] = current_ray
+
+        fake_ray = current_ray + FAKE_RAYS
+        if 0 <= fake_ray <= FAKE_RAYS_RANGE and distance > 30:
+            visible[n] = True
+            projection_height = min(
+                int(PROJECTION_COEFFICIENT / distance),
+                HEIGHT if doors[n] else DOUBLE_HEIGHT,
+            )
+            heights[n] = projection_height
+            sizes[n, 0] = int(projection_height * scales[n, 0])
+            sizes[n, 1] = int(projection_height * scales[n, 1])
+            frame_index[n] = viewing_angle_frame(theta, frames[n])
+
+
+@njit(fastmath=True, cache=True)
+def cull_sprites(
+    rays, sizes, heights, reaches, distances, visible, depth_buffer, wall_heights
+):
+    # drop the projected sprites that are off screen or behind the walls on
+    # every ray they cover, returns how many of each were dropped
+    num_rays = depth_buffer.shape[0]
+    outside, occluded = 0, 0
+    for n in range(visible.shape[0]):
+        if not visible[n]:
+            continue
+        # the scale cache may round the width up by half a quantum
+        half_width = sizes[n, 0] // 2 + SCALE_CACHE_QUANTUM
+        left = rays[n] * SCALE - half_width
+        right = rays[n] * SCALE + half_width
+        if right <= 0 or left >= WIDTH:
+            visible[n] = False
+            outside += 1
+            continue
+        # a nearer wall column hides the sprite if it is also taller than
+        # the highest and lowest point the sprite can be drawn at, give or
+        # take the rounding of the scale cache
+        reach = heights[n] * reaches[n] + 2 * SCALE_CACHE_QUANTUM
+        hidden = True
+        for ray in range(
+            max(0, left * num_rays // WIDTH),
+            min(num_rays, -(-right * num_rays // WIDTH)),
+        ):
+            if depth_buffer[ray] >= distances[n] or wall_heights[ray] < reach:
+                hidden = False
+                break
+        if hidden:
+            visible[n] = False
+            occluded += 1
+    return outside, occluded
 
 
 class Sprite:
+    __slots__ = (
+        "object",
+        "viewing_angles",
+        "shift",
+        "scale",
+        "animation",
+        "death_animation",
+        "is_dead",
+        "dead_shift",
+        "animation_dist",
+        "animation_speed",
+        "blocked",
+        "flag",
+        "obj_action",
+        "xy",
+        "slot",
+        "sprites",
+        "side",
+        "dead_animation_count",
+        "animation_count",
+        "animation_frame",
+        "action_frame",
+        "death_frame",
+        "enemy_action_trigger",
+        "door_open_trigger",
+        "door_prev_position",
+        "delete",
+        "spatial_index",
+        "sprite_positions",
+    )
+
     def __init__(self, params, position):
-        self.object = params["sprite"].copy()
+        # frames are shared by every object of a kind, each object only keeps
+        # the index of its current frame
+        self.object = params["sprite"]
         self.viewing_angles = params["viewing_angles"]
         self.shift = params["shift"]
         self.scale = params["scale"]
-        self.animation = params["animation"].copy()
+        self.animation = params["animation"]
 
-        self.death_animation = params["death_animation"].copy()
+        self.death_animation = params["death_animation"]
         self.is_dead = params["is_dead"]
         self.dead_shift = params["dead_shift"]
 
@@ -25,30 +166,54 @@ class Sprite:
         self.animation_speed = params["animation_speed"]
         self.blocked = params["blocked"]
         self.flag = params["flag"]
-        self.obj_action = params["obj_action"].copy()
-        self.x, self.y = position[0] * TILE, position[1] * TILE
+        self.obj_action = params["obj_action"]
+        # position, replaced by a view into the SpriteSet arrays once added
+        self.xy = np.array([position[0] * TILE, position[1] * TILE])
+        self.slot = None
+        self.sprites = None
         self.side = params["side"]
 
         self.dead_animation_count = 0
         self.animation_count = 0
+        self.animation_frame = 0
+        self.action_frame = 0
+        self.death_frame = 0
         self.enemy_action_trigger = False
         self.door_open_trigger = False
         self.door_prev_position = self.y if self.flag == "door_h" else self.x
         self.delete = False
+        self.spatial_index = None
 
-        if self.viewing_angles:
-            if len(self.object) == 8:
-                self.sprite_angles = [
-                    frozenset(range(338, 361)) | frozenset(range(0, 23))
-                ] + [frozenset(range(i, i + 45)) for i in range(23, 338, 45)]
-            else:
-                self.sprite_angles = [
-                    frozenset(range(348, 361)) | frozenset(range(0, 11))
-                ] + [frozenset(range(i, i + 23)) for i in range(11, 348, 23)]
-            self.sprite_positions = {
-                angle: position
-                for angle, position in zip(self.sprite_angles, self.object)
-            }
+        # one frame per viewing angle sector, picked in project_sprites
+        self.sprite_positions = self.object if self.viewing_angles else None
+
+    @property
+    def x(self):
+        return self.xy[0]
+
+    @x.setter
+    def x(self, value):
+        self.xy[0] = value
+
+    @property
+    def y(self):
+        return self.xy[1]
+
+    @y.setter
+    def y(self, value):
+        self.xy[1] = value
+
+    @property
+    def distance_to_sprite(self):
+        return self.sprites.distances[self.slot]
+
+    @property
+    def current_ray(self):
+        return self.sprites.rays[self.slot]
+
+    @property
+    def projection_height(self):
+        return self.sprites.heights[self.slot]
 
     @property
     def is_on_fire(self):
@@ -63,143 +228,145 @@ class Sprite:
     def position(self):
         return self.x - self.side // 2, self.y - self.side // 2
 
-    def object_locate(self, player):
-        dx, dy = self.x - player.x, self.y - player.y
-        self.distance_to_sprite = math.sqrt(dx ** 2 + dy ** 2)
-
-        self.theta = math.atan2(dy, dx)
-        gamma = self.theta - player.angle
-        if dx > 0 and 180 <= math.degrees(player.angle) <= 360 or dx < 0 and dy < 0:
-            gamma += 2 * math.pi
-        self.theta -= 1.4 * gamma
-
-        delta_rays = int(gamma / DELTA_ANGLE)
-        self.current_ray = CENTER_RAY + delta_rays
-        if self.flag not in {"door_h", "door_v"}:
-            self.distance_to_sprite *= math.cos(
-                HALF_FOV - self.current_ray * DELTA_ANGLE
-            )
+    def object_locate(self, sprite_width, sprite_height, frame):
+        # frame size and viewing angle frame come from project_sprites, the
+        # animation frames from tick
+        half_sprite_height = sprite_height // 2
+        shift = half_sprite_height * self.shift
 
-        fake_ray = self.current_ray + FAKE_RAYS
-        if 0 <= fake_ray <= FAKE_RAYS_RANGE and self.distance_to_sprite > 30:
-            self.projection_height = min(
-                int(PROJECTION_COEFFICIENT / self.distance_to_sprite),
-                DOUBLE_HEIGHT if self.flag not in {"door_h", "door_v"} else HEIGHT,
-            )  # <--------
-            sprite_width = int(self.projection_height * self.scale[0])
-            sprite_height = int(self.projection_height * self.scale[1])
-            half_sprite_width = sprite_width // 2
-            half_sprite_height = sprite_height // 2
-            shift = half_sprite_height * self.shift
-
-            # logic for doors, enemy, decors
-            if self.flag == "door_h" or self.flag == "door_v":
-                if self.door_open_trigger:
-                    self.door_open()
-                self.object = self.visible_sprite()
-                sprite_object = self.sprite_animation()
+        # logic for doors, enemy, decors
+        if self.flag == "door_h" or self.flag == "door_v":
+            self.object = self.visible_sprite(frame)
+            sprite_object = self.sprite_animation()
+        else:
+            if self.is_dead and self.is_dead != "immortal":
+                sprite_object = self.dead_animation()
+                shift = half_sprite_height * self.dead_shift
+                sprite_height = int(sprite_height / 1.3)
+            elif self.enemy_action_trigger:
+                sprite_object = self.enemy_in_action()
             else:
-                if self.is_dead and self.is_dead != "immortal":
-                    sprite_object = self.dead_animation()
-                    shift = half_sprite_height * self.dead_shift
-                    sprite_height = int(sprite_height / 1.3)
-                elif self.enemy_action_trigger:
-                    sprite_object = self.enemy_in_action()
-                else:
-                    # choose sprite for angle
-                    self.object = self.visible_sprite()
-                    # sprite animation
-                    sprite_object = self.sprite_animation()
-            sprite = pygame.transform.scale(
-                sprite_object, (sprite_width, sprite_height)
-            )
-            sprite_position = (
-                self.current_ray * SCALE - half_sprite_width,
-                HALF_HEIGHT - half_sprite_height + shift,
-            )
+                # choose sprite for angle
+                self.object = self.visible_sprite(frame)
+                # sprite animation
+                sprite_object = self.sprite_animation()
+        sprite = scaled_surfaces.scale(sprite_object, (sprite_width, sprite_height))
+        sprite_position = (
+            self.current_ray * SCALE - sprite.get_width() // 2,
+            HALF_HEIGHT - half_sprite_height + shift,
+        )
 
-            return (self.distance_to_sprite, sprite, sprite_position)
-        else:
-            return (False,)
+        return (self.distance_to_sprite, sprite, sprite_position)
 
-    def sprite_animation(self):
-        if self.animation and self.distance_to_sprite < self.animation_dist:
-            sprite_object = self.animation[0]
+    def tick(self):
+        # one simulation tick of the door and of the animation counters,
+        # whether the object is drawn or not
+        if self.flag == "door_h" or self.flag == "door_v":
+            if self.door_open_trigger:
+                self.door_open()
+        elif self.is_dead and self.is_dead != "immortal":
+            if self.death_frame < len(self.death_animation):
+                if self.dead_animation_count < self.animation_speed:
+                    self.dead_animation_count += 1
+                else:
+                    self.death_frame += 1
+                    self.dead_animation_count = 0
+        elif self.enemy_action_trigger:
             if self.animation_count < self.animation_speed:
                 self.animation_count += 1
             else:
-                self.animation.rotate(-1)
+                self.action_frame = (self.action_frame - 1) % len(self.obj_action)
+                self.animation_count = 0
+        elif self.animation:
+            if self.animation_count < self.animation_speed:
+                self.animation_count += 1
+            else:
+                self.animation_frame = (self.animation_frame + 1) % len(self.animation)
                 self.animation_count = 0
-            return sprite_object
-        return self.object
 
-    def visible_sprite(self):
-        if self.viewing_angles:
-            if self.theta < 0:
-                self.theta += 2 * math.pi
-            self.theta = 360 - int(math.degrees(self.theta))
+    def sprite_animation(self):
+        if self.animation and self.distance_to_sprite < self.animation_dist:
+            return self.animation[self.animation_frame]
+        return self.object
 
-            for angles in self.sprite_angles:
-                if self.theta in angles:
-                    return self.sprite_positions[angles]
+    def visible_sprite(self, frame):
+        if self.viewing_angles and frame >= 0:
+            return self.sprite_positions[frame]
         return self.object
 
     def dead_animation(self):
-        if len(self.death_animation):
-            if self.dead_animation_count < self.animation_speed:
-                self.dead_sprite = self.death_animation[0]
-                self.dead_animation_count += 1
-            else:
-                self.dead_sprite = self.death_animation.popleft()
-                self.dead_animation_count = 0
-        return self.dead_sprite
+        # the last frame stays once the animation ends
+        return self.death_animation[
+            min(self.death_frame, len(self.death_animation) - 1)
+        ]
 
     def enemy_in_action(self):
-        sprite_object = self.obj_action[0]
-        if self.animation_count < self.animation_speed:
-            self.animation_count += 1
-        else:
-            self.obj_action.rotate()
-            self.animation_count = 0
-        return sprite_object
+        return self.obj_action[self.action_frame]
 
     def door_open(self):
         if self.flag == "door_h":
             self.y -= 3
             if abs(self.y - self.door_prev_position) > TILE:
-                self.delete = True
+                self.sprites.mark_deleted(self)
         elif self.flag == "door_v":
             self.x -= 3
             if abs(self.x - self.door_prev_position) > TILE:
-                self.delete = True
+                self.sprites.mark_deleted(self)
+        if self.spatial_index is not None:
+            self.spatial_index.move(self)
+
+
+SPRITE_ARRAYS = (
+    ("positions", (2,), np.float64),
+    ("active", (), np.bool_),
+    ("doors", (), np.bool_),
+    ("frames", (), np.int32),
+    ("scales", (2,), np.float64),
+    ("distances", (), np.float64),
+    ("rays", (), np.int64),
+    ("heights", (), np.int64),
+    ("sizes", (2,), np.int64),
+    ("frame_index", (), np.int32),
+    ("visible", (), np.bool_),
+    ("reaches", (), np.float64),
+    ("enemies", (), np.bool_),
+    ("sighted", (), np.bool_),
+    # positions at the start of the last simulation tick and the positions
+    # drawn between them and the current ones
+    ("previous_positions", (2,), np.float64),
+    ("drawn_positions", (2,), np.float64),
+)
+
+# SpriteSet arrays in project_sprites argument order
+PROJECTED_ARRAYS = (
+    "positions",
+    "active",
+    "doors",
+    "frames",
+    "scales",
+    "distances",
+    "rays",
+    "heights",
+    "sizes",
+    "frame_index",
+    "visible",
+)
 
 
 class SpriteSet:
     def __init__(self):
         self.sprite_params = {
             "sprite_barrel": {
-                "sprite": pygame.image.load(
-                    "./game/sprites/barrel/base/0.png"
-                ).convert_alpha(),
+                "sprite": load_image("./game/sprites/barrel/base/0.png"),
                 "viewing_angles": None,
                 "shift": 1.8,
                 "scale": (0.4, 0.4),
                 "side": 30,
-                "animation": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/barrel/anim/{i}.png"
-                        ).convert_alpha()
-                        for i in range(12)
-                    ]
+                "animation": FrameSet(
+                    f"./game/sprites/barrel/anim/{i}.png" for i in range(12)
                 ),
-                "death_animation": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/barrel/death/{i}.png"
-                        ).convert_alpha()
-                        for i in range(4)
-                    ]
+                "death_animation": FrameSet(
+                    f"./game/sprites/barrel/death/{i}.png" for i in range(4)
                 ),
                 "is_dead": None,
                 "dead_shift": 2.6,
@@ -210,20 +377,13 @@ class SpriteSet:
                 "obj_action": [],
             },
             "sprite_pin": {
-                "sprite": pygame.image.load(
-                    "./game/sprites/pin/base/0.png"
-                ).convert_alpha(),
+                "sprite": load_image("./game/sprites/pin/base/0.png"),
                 "viewing_angles": None,
                 "shift": 0.6,
                 "scale": (0.6, 0.6),
                 "side": 30,
-                "animation": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/pin/anim/{i}.png"
-                        ).convert_alpha()
-                        for i in range(8)
-                    ]
+                "animation": FrameSet(
+                    f"./game/sprites/pin/anim/{i}.png" for i in range(8)
                 ),
                 "death_animation": [],
                 "is_dead": "immortal",
@@ -235,20 +395,13 @@ class SpriteSet:
                 "obj_action": [],
             },
             "sprite_flame": {
-                "sprite": pygame.image.load(
-                    "./game/sprites/flame/base/0.png"
-                ).convert_alpha(),
+                "sprite": load_image("./game/sprites/flame/base/0.png"),
                 "viewing_angles": None,
                 "shift": 0.7,
                 "scale": (0.6, 0.6),
                 "side": 30,
-                "animation": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/flame/anim/{i}.png"
-                        ).convert_alpha()
-                        for i in range(16)
-                    ]
+                "animation": FrameSet(
+                    f"./game/sprites/flame/anim/{i}.png" for i in range(16)
                 ),
                 "death_animation": [],
                 "is_dead": "immortal",
@@ -260,24 +413,16 @@ class SpriteSet:
                 "obj_action": [],
             },
             "enemy_devil0": {
-                "sprite": [
-                    pygame.image.load(
-                        f"./game/sprites/enemy/devil0/base/{i}.png"
-                    ).convert_alpha()
-                    for i in range(8)
-                ],
+                "sprite": FrameSet(
+                    f"./game/sprites/enemy/devil0/base/{i}.png" for i in range(8)
+                ),
                 "viewing_angles": True,
                 "shift": 0.0,
                 "scale": (1.1, 1.1),
                 "side": 50,
                 "animation": [],
-                "death_animation": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/enemy/devil0/death/{i}.png"
-                        ).convert_alpha()
-                        for i in range(6)
-                    ]
+                "death_animation": FrameSet(
+                    f"./game/sprites/enemy/devil0/death/{i}.png" for i in range(6)
                 ),
                 "is_dead": None,
                 "dead_shift": 0.6,
@@ -285,34 +430,21 @@ class SpriteSet:
                 "animation_speed": 10,
                 "blocked": True,
                 "flag": "enemy",
-                "obj_action": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/enemy/devil0/anim/{i}.png"
-                        ).convert_alpha()
-                        for i in range(9)
-                    ]
+                "obj_action": FrameSet(
+                    f"./game/sprites/enemy/devil0/anim/{i}.png" for i in range(9)
                 ),
             },
             "enemy_devil1": {
-                "sprite": [
-                    pygame.image.load(
-                        f"./game/sprites/enemy/devil1/base/{i}.png"
-                    ).convert_alpha()
-                    for i in range(8)
-                ],
+                "sprite": FrameSet(
+                    f"./game/sprites/enemy/devil1/base/{i}.png" for i in range(8)
+                ),
                 "viewing_angles": True,
                 "shift": 0,
                 "scale": (0.9, 1.0),
                 "side": 30,
                 "animation": [],
-                "death_animation": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/enemy/devil1/death/{i}.png"
-                        ).convert_alpha()
-                        for i in range(11)
-                    ]
+                "death_animation": FrameSet(
+                    f"./game/sprites/enemy/devil1/death/{i}.png" for i in range(11)
                 ),
                 "is_dead": None,
                 "dead_shift": 0.5,
@@ -320,34 +452,21 @@ class SpriteSet:
                 "animation_speed": 6,
                 "blocked": True,  # <-------------------
                 "flag": "enemy",
-                "obj_action": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/enemy/devil1/action/{i}.png"
-                        ).convert_alpha()
-                        for i in range(6)
-                    ]
+                "obj_action": FrameSet(
+                    f"./game/sprites/enemy/devil1/action/{i}.png" for i in range(6)
                 ),
             },
             "enemy_soldier0": {
-                "sprite": [
-                    pygame.image.load(
-                        f"./game/sprites/enemy/soldier0/base/{i}.png"
-                    ).convert_alpha()
-                    for i in range(8)
-                ],
+                "sprite": FrameSet(
+                    f"./game/sprites/enemy/soldier0/base/{i}.png" for i in range(8)
+                ),
                 "viewing_angles": True,
                 "shift": 0.8,
                 "scale": (0.4, 0.6),
                 "side": 30,
                 "animation": [],
-                "death_animation": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/enemy/soldier0/death/{i}.png"
-                        ).convert_alpha()
-                        for i in range(10)
-                    ]
+                "death_animation": FrameSet(
+                    f"./game/sprites/enemy/soldier0/death/{i}.png" for i in range(10)
                 ),
                 "is_dead": None,
                 "dead_shift": 1.7,
@@ -355,34 +474,21 @@ class SpriteSet:
                 "animation_speed": 6,
                 "blocked": True,
                 "flag": "enemy",
-                "obj_action": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/enemy/soldier0/action/{i}.png"
-                        ).convert_alpha()
-                        for i in range(4)
-                    ]
+                "obj_action": FrameSet(
+                    f"./game/sprites/enemy/soldier0/action/{i}.png" for i in range(4)
                 ),
             },
             "enemy_soldier1": {
-                "sprite": [
-                    pygame.image.load(
-                        f"./game/sprites/enemy/soldier1/base/{i}.png"
-                    ).convert_alpha()
-                    for i in range(8)
-                ],
+                "sprite": FrameSet(
+                    f"./game/sprites/enemy/soldier1/base/{i}.png" for i in range(8)
+                ),
                 "viewing_angles": True,
                 "shift": 0.8,
                 "scale": (0.4, 0.6),
                 "side": 30,
                 "animation": [],
-                "death_animation": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/enemy/soldier1/death/{i}.png"
-                        ).convert_alpha()
-                        for i in range(11)
-                    ]
+                "death_animation": FrameSet(
+                    f"./game/sprites/enemy/soldier1/death/{i}.png" for i in range(11)
                 ),
                 "is_dead": None,
                 "dead_shift": 1.7,
@@ -390,22 +496,14 @@ class SpriteSet:
                 "animation_speed": 6,
                 "blocked": True,  # <-------------------
                 "flag": "enemy",
-                "obj_action": deque(
-                    [
-                        pygame.image.load(
-                            f"./game/sprites/enemy/soldier1/action/{i}.png"
-                        ).convert_alpha()
-                        for i in range(4)
-                    ]
+                "obj_action": FrameSet(
+                    f"./game/sprites/enemy/soldier1/action/{i}.png" for i in range(4)
                 ),
             },
             "sprite_door_v": {
-                "sprite": [
-                    pygame.image.load(
-                        f"./game/sprites/doors/door_v/{i}.png"
-                    ).convert_alpha()
-                    for i in range(16)
-                ],
+                "sprite": FrameSet(
+                    f"./game/sprites/doors/door_v/{i}.png" for i in range(16)
+                ),
                 "viewing_angles": True,
                 "shift": 0.1,
                 "scale": (2.6, 1.2),
@@ -421,12 +519,9 @@ class SpriteSet:
                 "obj_action": [],
             },
             "sprite_door_h": {
-                "sprite": [
-                    pygame.image.load(
-                        f"./game/sprites/doors/door_h/{i}.png"
-                    ).convert_alpha()
-                    for i in range(16)
-                ],
+                "sprite": FrameSet(
+                    f"./game/sprites/doors/door_h/{i}.png" for i in range(16)
+                ),
                 "viewing_angles": True,
                 "shift": 0.1,
                 "scale": (2.6, 1.2),
@@ -442,7 +537,14 @@ class SpriteSet:
                 "obj_action": [],
             },
         }
-        self.list_of_objects = [
+        # frame sets are shared read-only between the objects of a kind and
+        # only decoded once one of them is drawn
+        for params in self.sprite_params.values():
+            for key in ("animation", "death_animation", "obj_action"):
+                if isinstance(params[key], list):
+                    params[key] = tuple(params[key])
+
+        objects = [
             Sprite(self.sprite_params["sprite_barrel"], (7.1, 2.1)),
             Sprite(self.sprite_params["sprite_barrel"], (5.9, 2.1)),
             Sprite(self.sprite_params["sprite_barrel"], (14.8, 12.28)),
@@ -522,18 +624,218 @@ class SpriteSet:
             Sprite(self.sprite_params["sprite_door_h"], (11.5, 6.5)),
         ]
 
-    @property
-    def sprite_shot(self):
-        return min(
-            [obj.is_on_fire for obj in self.list_of_objects], default=(float("inf"), 0)
+        # per-object projection state in arrays indexed by Sprite.slot, so all
+        # objects are projected in one project_sprites call
+        self.slots = []
+        self.free_slots = []
+        self.count = 0
+        # kept up to date on every change so the win check and the clean up
+        # do not scan the objects
+        self.live_enemies = 0
+        self.deleted = []
+        # closed doors per tile for the line of sight kernels, kept up to date
+        # as doors are added, opened and removed; the version is bumped on
+        # every change
+        self.door_grid = np.zeros(GRID_MAP.shape, dtype=np.int8)
+        self.door_version = 0
+        # sprites culled in the last located frame
+        self.drawn = 0
+        self.culled_outside = 0
+        self.culled_occluded = 0
+        self.reserve(len(objects))
+        # spatial index of the objects, kept up to date as they move
+        self.index = SpatialIndex()
+        for obj in objects:
+            self.add(obj)
+        self.hitscan_range = math.hypot(WORLD_WIDTH, WORLD_HEIGHT)
+        self.hitscan_spread = (
+            max(params["side"] for params in self.sprite_params.values()) // 2
+        ) * DELTA_ANGLE
+
+    def reserve(self, capacity):
+        old = {name: getattr(self, name, None) for name, _, _ in SPRITE_ARRAYS}
+        for name, shape, dtype in SPRITE_ARRAYS:
+            array = np.zeros((capacity,) + shape, dtype=dtype)
+            if old[name] is not None:
+                array[: len(old[name])] = old[name]
+            setattr(self, name, array)
+        for slot, obj in enumerate(self.slots):
+            if obj is not None:
+                obj.xy = self.positions[slot]
+
+    def list_of_objects(self):
+        # a new list of the objects in use, loops over the objects should go
+        # through self.slots instead
+        return [obj for obj in self.slots if obj is not None]
+
+    def add(self, obj):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.slots)
+            self.slots.append(None)
+            if slot == len(self.positions):
+                self.reserve(2 * slot)
+        self.positions[slot] = obj.xy
+        self.previous_positions[slot] = obj.xy
+        obj.xy, obj.slot, obj.sprites = self.positions[slot], slot, self
+        self.slots[slot] = obj
+        self.active[slot] = True
+        self.doors[slot] = obj.flag == "door_h" or obj.flag == "door_v"
+        self.frames[slot] = len(obj.sprite_positions) if obj.viewing_angles else 0
+        self.scales[slot] = obj.scale
+        # twice how far the sprite reaches above or below the horizon, in
+        # sprite heights, alive or dead (drawn 1.3 times shorter from the top
+        # an alive sprite would have)
+        reach = 1 + abs(obj.shift)
+        if obj.is_dead != "immortal":
+            top = obj.dead_shift - 1
+            reach = max(reach, abs(top), abs(top + 2 / 1.3))
+        self.reaches[slot] = obj.scale[1] * reach
+        self.count += 1
+        # live enemies, and whether they saw the player on the last check
+        self.enemies[slot] = obj.flag == "enemy" and not obj.is_dead
+        self.sighted[slot] = obj.enemy_action_trigger
+        if self.enemies[slot]:
+            self.live_enemies += 1
+        if self.doors[slot] and obj.blocked:
+            self.count_door(obj, 1)
+        obj.spatial_index = self.index
+        self.index.insert(obj)
+
+    def remove(self, obj):
+        self.index.remove(obj)
+        self.active[obj.slot] = False
+        self.enemies[obj.slot] = False
+        self.slots[obj.slot] = None
+        self.free_slots.append(obj.slot)
+        self.count -= 1
+        if obj.flag == "enemy" and not obj.is_dead:
+            self.live_enemies -= 1
+        if self.doors[obj.slot] and obj.blocked:
+            self.count_door(obj, -1)
+        obj.xy = obj.xy.copy()
+        obj.sprites = None
+
+    def kill(self, obj):
+        if obj.flag == "enemy" and not obj.is_dead:
+            self.live_enemies -= 1
+        self.enemies[obj.slot] = False
+        obj.is_dead = True
+        obj.blocked = None
+
+    def live_enemy_slots(self):
+        return np.flatnonzero(self.enemies[: len(self.slots)])
+
+    def count_door(self, obj, change):
+        i, j = int(obj.x // TILE), int(obj.y // TILE)
+        rows, columns = self.door_grid.shape
+        if 0 <= i < columns and 0 <= j < rows:
+            self.door_grid[j, i] += change
+        self.door_version += 1
+
+    def open_door(self, obj):
+        if obj.blocked:
+            self.count_door(obj, -1)
+        obj.door_open_trigger = True
+        obj.blocked = None
+
+    def mark_deleted(self, obj):
+        if not obj.delete:
+            obj.delete = True
+            self.deleted.append(obj)
+
+    def clear_deleted(self):
+        for obj in self.deleted:
+            self.remove(obj)
+        self.deleted.clear()
+
+    def prefetch(self, player):
+        # start decoding the frames of the objects around the player before
+        # they come into view
+        for obj in self.index.query_radius(
+            player.x, player.y, ANIMATION_PREFETCH_RADIUS
+        ):
+            for frame_set in (
+                obj.sprite_positions,
+                obj.animation,
+                obj.death_animation,
+                obj.obj_action,
+            ):
+                if isinstance(frame_set, FrameSet):
+                    frame_sets.prefetch(frame_set)
+
+    def tick(self):
+        # one simulation tick of the doors and animations of every object
+        for obj in self.slots:
+            if obj is not None:
+                obj.tick()
+
+    def snapshot(self):
+        # called before each simulation tick
+        count = len(self.slots)
+        self.previous_positions[:count] = self.positions[:count]
+
+    def project(self, player, positions=None):
+        count = len(self.slots)
+        project_sprites(
+            float(player.x),
+            float(player.y),
+            float(player.angle),
+            self.positions[:count] if positions is None else positions,
+            *(getattr(self, name)[:count] for name in PROJECTED_ARRAYS[1:]),
         )
 
-    @property
-    def blocked_doors(self):
-        blocked_doors = Dict.empty(key_type=types.UniTuple(int32, 2), value_type=int32)
-        for obj in self.list_of_objects:
-            if obj.flag == "door_h" or obj.flag == "door_v":
-                if obj.blocked:
-                    i, j = mapping(obj.x, obj.y)
-                    blocked_doors[(i, j)] = 0
-        return blocked_doors
+    def locate(self, player, depth_buffer=None, wall_heights=None, alpha=1.0):
+        # depth_buffer and wall_heights: per-ray depth and height of the walls
+        # of this frame, sprites fully behind them are not scaled; alpha: how
+        # far the frame is between the previous tick and the last one
+        frame_sets.tick()
+        if frame_sets.frame % ANIMATION_PREFETCH_FRAMES == 1:
+            self.prefetch(player)
+        count = len(self.slots)
+        positions = None
+        if alpha < 1:
+            positions = self.drawn_positions[:count]
+            previous = self.previous_positions[:count]
+            np.subtract(self.positions[:count], previous, out=positions)
+            positions *= alpha
+            positions += previous
+        self.project(player, positions)
+        if depth_buffer is not None:
+            self.culled_outside, self.culled_occluded = cull_sprites(
+                self.rays[:count],
+                self.sizes[:count],
+                self.heights[:count],
+                self.reaches[:count],
+                self.distances[:count],
+                self.visible[:count],
+                depth_buffer,
+                wall_heights,
+            )
+        visible = np.flatnonzero(self.visible[:count])
+        self.drawn = len(visible)
+        return [
+            self.slots[slot].object_locate(
+                *self.sizes[slot].tolist(), int(self.frame_index[slot])
+            )
+            for slot in visible
+        ]
+
+    def summary(self):
+        return (
+            f"sprites: {self.drawn} drawn, {self.culled_occluded} occluded,"
+            f" {self.culled_outside} off screen"
+        )
+
+    def objects_on_fire(self, player):
+        # candidates for is_on_fire: objects near the center ray of the player
+        return self.index.query_ray(
+            player.x, player.y, player.angle, self.hitscan_range, self.hitscan_spread
+        )
+
+    def sprite_shot(self, player):
+        return min(
+            [obj.is_on_fire for obj in self.objects_on_fire(player)],
+            default=(float("inf"), 0),
+        )
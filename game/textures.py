@@ -0,0 +1,45 @@
+import pygame
+from game.config import *
+
+
+class WallTextures:
+    def __init__(self, textures, min_height=WALL_MIP_MIN_HEIGHT):
+        # texture id -> mip levels, each level a list of TILE column strips
+        self.levels = {}
+        self.heights = []
+        for key, texture in textures.items():
+            if key == "S":
+                continue
+            levels, heights = [], []
+            level = texture
+            while True:
+                width, height = level.get_size()
+                strip_width = max(1, width // TILE)
+                levels.append(
+                    [
+                        level.subsurface(
+                            min(offset * width // TILE, width - strip_width),
+                            0,
+                            strip_width,
+                            height,
+                        ).copy()
+                        for offset in range(TILE)
+                    ]
+                )
+                heights.append(height)
+                if height // 2 < min_height:
+                    break
+                level = pygame.transform.smoothscale(level, (width // 2, height // 2))
+            self.levels[key] = levels
+            self.heights = heights
+
+        # smallest level at least as tall as the projected wall
+        self.level_index = [0] * (TEXTURE_HEIGHT + 1)
+        for projection_height in range(TEXTURE_HEIGHT + 1):
+            for index, height in enumerate(self.heights):
+                if height >= projection_height:
+                    self.level_index[projection_height] = index
+
+    def strip(self, texture, offset, projection_height):
+        level = self.level_index[max(1, min(projection_height, TEXTURE_HEIGHT))]
+        return self.levels[texture][level][offset]
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+from game.config import *
+from game.controls import ScriptedInput, load_demo
+
+
+class TimeDemo:
+    # a recorded demo played back as fast as the frames are drawn, with the
+    # time of every frame
+    def __init__(self, path):
+        self.path = path
+        steps, self.tick_rate = load_demo(path)
+        self.controls = ScriptedInput(steps)
+        self.frame_times = []
+        self.last = None
+
+    @property
+    def finished(self):
+        return self.controls.finished
+
+    def start(self):
+        self.last = time.perf_counter()
+
+    def frame(self):
+        now = time.perf_counter()
+        self.frame_times.append(now - self.last)
+        self.last = now
+
+    def histogram(self, edges=TIMEDEMO_HISTOGRAM_MS):
+        # frames per bucket, the last one is past the last edge
+        buckets = np.searchsorted(edges, np.array(self.frame_times) * 1e3, "right")
+        return np.bincount(buckets, minlength=len(edges) + 1)
+
+    def report(self, edges=TIMEDEMO_HISTOGRAM_MS):
+        times = np.array(self.frame_times)
+        seconds = times.sum()
+        lines = [
+            f"timedemo {self.path}: {len(times)} frames in {seconds:.2f} s,"
+            f" {len(times) / self.tick_rate:.1f} s of play",
+            f"fps: average {len(times) / seconds:.1f}, min {1 / times.max():.1f},"
+            f" max {1 / times.min():.1f}",
+            "frame time:",
+        ]
+        counts = self.histogram(edges)
+        labels = [f"< {edge} ms" for edge in edges] + [f">= {edges[-1]} ms"]
+        for label, count in zip(labels, counts):
+            bar = "#" * int(round(40 * count / max(counts.max(), 1)))
+            lines.append(f"  {label:>9} {count:6d} {bar}")
+        return lines
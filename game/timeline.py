@@ -0,0 +1,112 @@
+import numpy as np
+from game.config import *
+
+# per object and frame: animation frame, action frame, death frame, flags
+TIMELINE_DEAD = 1
+TIMELINE_ACTION = 2
+TIMELINE_BLOCKED = 4
+
+
+class Timeline:
+    # camera, object and weapon state of every drawn frame, enough to draw the
+    # frame again offline; the level objects are the ones SpriteSet creates,
+    # in slot order
+    def __init__(self, sprites=None):
+        self.objects = [] if sprites is None else list(sprites.slots)
+        self.times = []
+        self.cameras = []
+        self.active = []
+        self.positions = []
+        self.states = []
+        self.weapons = []
+
+    def __len__(self):
+        return len(self.cameras)
+
+    def capture(self, time, camera, sprites, player, alpha=1.0):
+        count = len(self.objects)
+        previous = sprites.previous_positions[:count]
+        positions = previous + (sprites.positions[:count] - previous) * alpha
+        states = np.zeros((count, 4), dtype=np.int16)
+        for n, obj in enumerate(self.objects):
+            if obj.sprites is None:
+                continue
+            dead = obj.is_dead and obj.is_dead != "immortal"
+            states[n] = (
+                obj.animation_frame,
+                obj.action_frame,
+                # the last death frame stays drawn once the animation ends
+                min(obj.death_frame, max(len(obj.death_animation) - 1, 0)),
+                (TIMELINE_DEAD if dead else 0)
+                | (TIMELINE_ACTION if obj.enemy_action_trigger else 0)
+                | (TIMELINE_BLOCKED if obj.blocked else 0),
+            )
+        weapon = player.weapon
+        self.times.append(time)
+        self.cameras.append((camera.x, camera.y, camera.angle))
+        self.active.append([obj.sprites is not None for obj in self.objects])
+        self.positions.append(positions)
+        self.states.append(states)
+        # the weapon frames drawn, -1 when not shown
+        self.weapons.append(
+            (
+                player.shot,
+                -1 if weapon.shot_frame is None else weapon.shot_frame,
+                -1 if weapon.sfx_frame is None else weapon.sfx_frame,
+            )
+        )
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            times=np.array(self.times, dtype=np.float64),
+            cameras=np.array(self.cameras, dtype=np.float64).reshape(-1, 3),
+            active=np.array(self.active, dtype=np.bool_).reshape(len(self), -1),
+            positions=np.array(self.positions, dtype=np.float64).reshape(
+                len(self), -1, 2
+            ),
+            states=np.array(self.states, dtype=np.int16).reshape(len(self), -1, 4),
+            weapons=np.array(self.weapons, dtype=np.int16).reshape(-1, 3),
+        )
+
+    @classmethod
+    def load(cls, path):
+        timeline = cls()
+        with np.load(path) as data:
+            for name in ("times", "cameras", "active", "positions", "states"):
+                setattr(timeline, name, data[name])
+            timeline.weapons = data["weapons"]
+        return timeline
+
+    def restore(self, frame, sprites, player):
+        # puts the objects and the weapon in their state of the frame and
+        # returns the camera pose; objects gone by then are removed and put
+        # back if an earlier frame is restored later
+        if not self.objects:
+            self.objects = list(sprites.slots)
+        for n, obj in enumerate(self.objects):
+            if not self.active[frame, n]:
+                if obj.sprites is not None:
+                    sprites.remove(obj)
+                continue
+            if obj.sprites is None:
+                sprites.add(obj)
+            obj.x, obj.y = self.positions[frame, n].tolist()
+            sprites.index.move(obj)
+            animation, action, death, flags = self.states[frame, n].tolist()
+            obj.animation_frame = animation
+            obj.action_frame = action
+            obj.death_frame = death
+            if flags & TIMELINE_DEAD:
+                obj.is_dead = True
+            elif obj.is_dead is True:
+                obj.is_dead = None
+            obj.enemy_action_trigger = bool(flags & TIMELINE_ACTION)
+            # killed enemies and opened doors no longer stop shots
+            obj.blocked = True if flags & TIMELINE_BLOCKED else None
+        sprites.previous_positions[:] = sprites.positions
+        shot, shot_frame, sfx_frame = self.weapons[frame].tolist()
+        player.shot = bool(shot)
+        player.weapon.shot_frame = None if shot_frame < 0 else shot_frame
+        player.weapon.sfx_frame = None if sfx_frame < 0 else sfx_frame
+        return self.cameras[frame].tolist()
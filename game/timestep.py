@@ -0,0 +1,73 @@
+import math
+import time
+
+from game.config import *
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate=TICK_RATE, max_ticks=MAX_TICKS_PER_FRAME):
+        self.tick_rate = tick_rate
+        self.tick = 1 / tick_rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.last = None
+        self.ticks = 0
+        # simulated time given up when a frame took longer than max_ticks
+        self.dropped = 0.0
+
+    def advance(self):
+        # number of simulation ticks due since the previous frame
+        now = time.perf_counter()
+        # the first frame runs one tick
+        self.accumulator += self.tick if self.last is None else now - self.last
+        self.last = now
+        ticks = int(self.accumulator / self.tick)
+        if ticks > self.max_ticks:
+            self.dropped += (ticks - self.max_ticks) * self.tick
+            self.accumulator -= (ticks - self.max_ticks) * self.tick
+            ticks = self.max_ticks
+        self.accumulator -= ticks * self.tick
+        self.ticks += ticks
+        return ticks
+
+    @property
+    def alpha(self):
+        # how far the frame is between the last tick and the next one
+        return min(self.accumulator / self.tick, 1.0)
+
+
+class View:
+    # camera drawn between the player pose of the previous tick and the last one
+    def __init__(self, player):
+        self.player = player
+        self.snapshot()
+        self.update(1.0)
+
+    def snapshot(self):
+        self.previous = (self.player.x, self.player.y, self.player.angle)
+
+    def update(self, alpha):
+        x, y, angle = self.previous
+        self.x = x + (self.player.x - x) * alpha
+        self.y = y + (self.player.y - y) * alpha
+        # shortest way around, the player angle is kept in [0, 2 pi)
+        turn = (self.player.angle - angle + math.pi) % (2 * math.pi) - math.pi
+        self.angle = (angle + turn * alpha) % (2 * math.pi)
+
+    @property
+    def position(self):
+        return (self.x, self.y)
+
+
+class LockstepTimestep:
+    # one tick per frame however long the frame took, so a replayed demo runs
+    # the same ticks and draws the same frames on any machine
+    def __init__(self, tick_rate=TICK_RATE):
+        self.tick_rate = tick_rate
+        self.ticks = 0
+        self.dropped = 0.0
+        self.alpha = 1.0
+
+    def advance(self):
+        self.ticks += 1
+        return 1
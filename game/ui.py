@@ -1,10 +1,13 @@
+import numpy as np
 import pygame
 import sys
-from collections import deque
 from random import randrange
 
+from game.assets import load_image
+from game.cache import scaled_surfaces
 from game.config import *
 from game.map import MINIMAP
+from game.textures import WallTextures
 
 
 class UI:
@@ -12,74 +15,120 @@ class UI:
         self.screen = screen
         self.screen_map = screen_map
         self.player = player
+        # pose the world is drawn from, the player or a view interpolated
+        # between simulation ticks
+        self.camera = player
         self.clock = clock
         self.font = pygame.font.SysFont("Arial", 36, bold=True)
         self.font_win = pygame.font.Font("./game/font/main-font.ttf", 144)
         self.textures = {
-            1: pygame.image.load("./game/textures/wall1.png").convert(),
-            2: pygame.image.load("./game/textures/wall2.png").convert(),
-            3: pygame.image.load("./game/textures/wall3.png").convert(),
-            4: pygame.image.load("./game/textures/wall4.png").convert(),
-            "S": pygame.image.load("./game/textures/sky.png").convert(),
+            1: load_image("./game/textures/wall1.png", alpha=False),
+            2: load_image("./game/textures/wall2.png", alpha=False),
+            3: load_image("./game/textures/wall3.png", alpha=False),
+            4: load_image("./game/textures/wall4.png", alpha=False),
+            "S": load_image("./game/textures/sky.png", alpha=False),
         }
+        self.wall_textures = WallTextures(self.textures)
 
         # hud
-        self.hud = pygame.image.load("./game/textures/hud.png").convert_alpha()
+        self.hud = load_image("./game/textures/hud.png")
         # menu
         self.menu_trigger = True
-        self.menu_picture = pygame.image.load(
-            "./game/textures/background.jpg"
-        ).convert()
         # weapon parameters
-        self.weapon_base_sprite = pygame.image.load(
+        self.weapon_base_sprite = load_image(
             "./game/sprites/weapons/shotgun/base/0.png"
-        ).convert_alpha()
-        self.weapon_shot_animation = deque(
-            [
-                pygame.image.load(
-                    f"./game/sprites/weapons/shotgun/shot/{i}.png"
-                ).convert_alpha()
-                for i in range(20)
-            ]
         )
+        self.weapon_shot_animation = [
+            load_image(f"./game/sprites/weapons/shotgun/shot/{i}.png")
+            for i in range(20)
+        ]
         self.weapon_rect = self.weapon_base_sprite.get_rect()
         self.weapon_pos = (
             HALF_WIDTH - self.weapon_rect.width // 2,
             HEIGHT - self.weapon_rect.height,
         )
-        self.shot_length = len(self.weapon_shot_animation)
-        self.shot_length_count = 0
-        self.shot_animation_trigger = True
-        self.shot_animation_speed = 3
-        self.shot_animation_count = 0
-        self.shot_sound = pygame.mixer.Sound("./game/sound/shotgun.wav")
         # shot SFX
-        self.sfx = deque(
-            [
-                pygame.image.load(f"./game/sprites/weapons/sfx/{i}.png").convert_alpha()
-                for i in range(9)
-            ]
+        self.sfx = [load_image(f"./game/sprites/weapons/sfx/{i}.png") for i in range(9)]
+        # shot timing lives on the player, the frames drawn follow it
+        self.weapon = player.weapon
+        self.weapon.shot_length = len(self.weapon_shot_animation)
+        self.weapon.sfx_length = len(self.sfx)
+        self.weapon.shot_sound = pygame.mixer.Sound("./game/sound/shotgun.wav")
+
+        # cached overlay layers
+        self.glyphs = {}
+        self.mini_map_walls = pygame.Surface(MAP_RESOLUTION)
+        self.mini_map_walls.set_colorkey(BLACK)
+        for x, y in MINIMAP:
+            pygame.draw.rect(self.mini_map_walls, DARKBROWN, (x, y, MAP_TILE, MAP_TILE))
+        hud_top = min(self.weapon_pos[1], HUD_POSITION[1])
+        self.hud_layer_position = (0, hud_top)
+        self.hud_layer = pygame.Surface((WIDTH, HEIGHT - hud_top), pygame.SRCALPHA)
+        self.hud_layer.blit(
+            self.weapon_base_sprite,
+            (self.weapon_pos[0], self.weapon_pos[1] - hud_top),
+            special_flags=pygame.BLEND_RGBA_MAX,
         )
-        self.sfx_length_count = 0
-        self.sfx_length = len(self.sfx)
+        self.hud_layer.blit(self.hud, (HUD_POSITION[0], HUD_POSITION[1] - hud_top))
+        self.hud_layer = self.hud_layer.convert_alpha()
 
     def background(self):
-        sky_offset = -10 * math.degrees(self.player.angle) % WIDTH
+        sky_offset = -10 * math.degrees(self.camera.angle) % WIDTH
         self.screen.blit(self.textures["S"], (sky_offset, 0))
         self.screen.blit(self.textures["S"], (sky_offset - WIDTH, 0))
         self.screen.blit(self.textures["S"], (sky_offset + WIDTH, 0))
         pygame.draw.rect(self.screen, DARKGRAY, (0, HALF_HEIGHT, WIDTH, HALF_HEIGHT))
 
-    def world(self, world_objects):
+    def world(self, world_objects, depth_buffer=None):
         for obj in sorted(world_objects, key=lambda n: n[0], reverse=True):
             if obj[0]:
-                _, object, object_pos = obj
-                self.screen.blit(object, object_pos)
+                depth, object, object_pos = obj
+                if depth_buffer is None:
+                    self.screen.blit(object, object_pos)
+                else:
+                    self.occluded_blit(depth, object, object_pos, depth_buffer)
+
+    def occluded_blit(self, depth, object, object_pos, depth_buffer):
+        # blit only the column runs where the sprite is in front of the walls
+        num_rays = len(depth_buffer)
+        left, top = object_pos
+        right = left + object.get_width()
+        first_ray = max(0, int(left * num_rays // WIDTH))
+        last_ray = min(num_rays, int(-(-right * num_rays // WIDTH)))
+        if first_ray >= last_ray:
+            return
+        visible = depth_buffer[first_ray:last_ray] > depth
+        if visible.all():
+            self.screen.blit(object, object_pos)
+            return
+        edges = np.flatnonzero(np.diff(visible, prepend=False, append=False))
+        for start, end in zip(edges[::2], edges[1::2]):
+            run_left = max(left, (first_ray + start) * WIDTH // num_rays)
+            run_right = min(right, (first_ray + end) * WIDTH // num_rays)
+            self.screen.blit(
+                object,
+                (run_left, top),
+                (run_left - left, 0, run_right - run_left, object.get_height()),
+            )
+
+    def glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.glyphs[char] = self.font.render(char, 0, DARKORANGE)
+        return glyph
 
-    def fps(self, clock):
+    def text(self, text, position):
+        x, y = position
+        for char in text:
+            glyph = self.glyph(char)
+            self.screen.blit(glyph, (x, y))
+            x += glyph.get_width()
+
+    def fps(self, clock, resolution=None):
         display_fps = "FPS:" + str(int(clock.get_fps()))
-        render = self.font.render(display_fps, 0, DARKORANGE)
-        self.screen.blit(render, FPS_POSITION)
+        if resolution:
+            display_fps += " " + resolution
+        self.text(display_fps, FPS_POSITION)
 
     def play_music(self):
         pygame.mixer.pre_init(44100, -16, 2, 2048)
@@ -98,63 +147,48 @@ class UI:
 
     def mini_map(self):
         self.screen_map.fill(BLACK)
-        map_x, map_y = self.player.x // MAP_SCALE, self.player.y // MAP_SCALE
+        map_x, map_y = self.camera.x // MAP_SCALE, self.camera.y // MAP_SCALE
         pygame.draw.line(
             self.screen_map,
             YELLOW,
             (map_x, map_y),
             (
-                map_x + 8 * math.cos(self.player.angle),
-                map_y + 8 * math.sin(self.player.angle),
+                map_x + 8 * math.cos(self.camera.angle),
+                map_y + 8 * math.sin(self.camera.angle),
             ),
             2,
         )
         pygame.draw.circle(self.screen_map, RED, (int(map_x), int(map_y)), 4)
-        for x, y in MINIMAP:
-            pygame.draw.rect(self.screen_map, DARKBROWN, (x, y, MAP_TILE, MAP_TILE))
+        self.screen_map.blit(self.mini_map_walls, (0, 0))
         self.screen.blit(self.screen_map, MAP_POSITION)
 
     def player_weapon(self, shot_projections):
-        if self.player.shot:
-            if not self.shot_length_count:
-                self.shot_sound.play()
+        if self.weapon.shot_frame is not None:
             self.shot_projection = min(shot_projections)[1] // 2
             self.bullet_sfx()
-            shot_sprite = self.weapon_shot_animation[0]
+            shot_sprite = self.weapon_shot_animation[self.weapon.shot_frame]
             self.screen.blit(shot_sprite, self.weapon_pos)
-            self.shot_animation_count += 1
-            if self.shot_animation_count == self.shot_animation_speed:
-                self.weapon_shot_animation.rotate(-1)
-                self.shot_animation_count = 0
-                self.shot_length_count += 1
-                self.shot_animation_trigger = False
-            if self.shot_length_count == self.shot_length:
-                self.player.shot = False
-                # self.shot_animation_count = 0
-                self.shot_length_count = 0
-                self.sfx_length_count = 0
-                self.shot_animation_trigger = True
+            # hud
+            self.screen.blit(self.hud, HUD_POSITION)
         else:
-            self.screen.blit(self.weapon_base_sprite, self.weapon_pos)
-
-        # hud
-        self.screen.blit(self.hud, HUD_POSITION)
+            # weapon and hud, pre-composited
+            self.screen.blit(self.hud_layer, self.hud_layer_position)
 
     def bullet_sfx(self):
-        if self.sfx_length_count < self.sfx_length:
-            sfx = pygame.transform.scale(
-                self.sfx[0], (self.shot_projection, self.shot_projection)
+        if self.weapon.sfx_frame is not None:
+            sfx = scaled_surfaces.scale(
+                self.sfx[self.weapon.sfx_frame],
+                (self.shot_projection, self.shot_projection),
             )
             sfx_rect = sfx.get_rect()
             self.screen.blit(
                 sfx,
                 (HALF_WIDTH - sfx_rect.width // 2, HALF_HEIGHT - sfx_rect.height // 2),
             )
-            self.sfx_length_count += 1
-            self.sfx.rotate(-1)
 
     def menu(self):
         x = 0
+        menu_picture = load_image("./game/textures/background.jpg", alpha=False)
         pygame.mixer.music.load("./game/sound/win.wav")
         pygame.mixer.music.play()
         button_font = pygame.font.Font("./game/font/main-font.ttf", 72)
@@ -173,7 +207,7 @@ class UI:
                     sys.exit()
 
             self.screen.blit(
-                self.menu_picture, (0, 0), (x % WIDTH, HALF_HEIGHT, WIDTH, HEIGHT)
+                menu_picture, (0, 0), (x % WIDTH, HALF_HEIGHT, WIDTH, HEIGHT)
             )
             x += 1
 
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+
+import numpy as np
+from numba import typeof
+from game.config import *
+from game.map import GRID_MAP, WORLD_MAP, build_world_map
+from game.raycaster import caster, mapping, ray_casting, ray_casting_dda
+from game.renderer import plane_casting
+from game.logic import line_of_sight
+from game.sprite import PROJECTED_ARRAYS, cull_sprites, project_sprites
+
+
+def kernel_arguments(sprites, logic, frame_buffer=None):
+    # one argument set per signature the game calls each kernel with
+    obj = sprites.list_of_objects()[0]
+    count = len(sprites.slots)
+    kernels = [
+        (build_world_map, (GRID_MAP,)),
+        (mapping, (obj.x, obj.y)),
+        (ray_casting, ((0.0, 0.0), 0.0, WORLD_MAP)),
+        (
+            caster.kernel,
+            (
+                (0.0, 0.0),
+                0.0,
+                GRID_MAP,
+                caster.ray_offsets,
+                caster.ray_cosines,
+                caster.projection_coefficient,
+                caster.depths,
+                caster.offsets,
+                caster.heights,
+                caster.textures,
+            ),
+        ),
+        (
+            project_sprites,
+            (0.0, 0.0, 0.0)
+            + tuple(getattr(sprites, name)[:count] for name in PROJECTED_ARRAYS),
+        ),
+        (
+            cull_sprites,
+            tuple(
+                getattr(sprites, name)[:count]
+                for name in ("rays", "sizes", "heights", "reaches", "distances")
+            )
+            + (sprites.visible[:count], caster.depths, caster.heights),
+        ),
+        (line_of_sight, (0.0, 0.0, 0.0, 0.0, GRID_MAP, sprites.door_grid)),
+        (
+            logic.cast,
+            (
+                sprites.positions,
+                sprites.live_enemy_slots(),
+                0.0,
+                0.0,
+                GRID_MAP,
+                sprites.door_grid,
+                np.full(GRID_MAP.shape, -1, dtype=np.int8),
+                np.zeros(0, dtype=np.bool_),
+            ),
+        ),
+    ]
+    if frame_buffer is not None:
+        kernels.append(
+            (
+                plane_casting,
+                (
+                    (0.0, 0.0),
+                    0.0,
+                    frame_buffer.ray_tangents,
+                    frame_buffer.row_distances,
+                    caster.heights,
+                    frame_buffer.floor,
+                    frame_buffer.pixels,
+                    True,
+                ),
+            )
+        )
+    return kernels
+
+
+class WarmUp:
+    def __init__(self, sprites, logic, frame_buffer=None):
+        self.sprites = sprites
+        self.logic = logic
+        self.frame_buffer = frame_buffer
+        # (kernel, signature, seconds, loaded from the on-disk cache)
+        self.results = []
+        self.seconds = 0.0
+        self.thread = None
+
+    def run(self):
+        started = time.perf_counter()
+        kernels = kernel_arguments(self.sprites, self.logic, self.frame_buffer)
+        for dispatcher, args in kernels:
+            signature = tuple(typeof(arg) for arg in args)
+            start = time.perf_counter()
+            dispatcher.compile(signature)
+            # a miss means the signature was compiled instead of loaded from disk
+            cached = not dispatcher.stats.cache_misses.get(signature)
+            self.results.append(
+                (dispatcher.__name__, signature, time.perf_counter() - start, cached)
+            )
+        self.seconds = time.perf_counter() - started
+
+    def start(self):
+        # compiles while the menu is shown
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def join(self):
+        if self.thread is not None:
+            self.thread.join()
+
+    @property
+    def cache_writable(self):
+        path = ray_casting_dda.stats.cache_path
+        return os.access(path, os.W_OK)
+
+    def summary(self):
+        compiled = [name for name, _, _, cached in self.results if not cached]
+        line = (
+            f"jit {self.seconds:.2f} s, {len(self.results) - len(compiled)} of"
+            f" {len(self.results)} loaded from cache"
+        )
+        if compiled:
+            line += ", compiled " + ", ".join(sorted(set(compiled)))
+        if not self.cache_writable:
+            line += ", cache directory not writable"
+        return line
+
+    def details(self):
+        return [
+            f"  {name}: {seconds * 1e3:.1f} ms" + ("" if cached else " (compiled)")
+            for name, _, seconds, cached in self.results
+        ]
+
+
+def startup_report(phases, warm_up):
+    # phases: (name, seconds) of launch in order, warm-up ran during the menu
+    lines = ["startup: " + ", ".join(f"{n} {s:.2f} s" for n, s in phases)]
+    lines.append(warm_up.summary())
+    return lines + warm_up.details()
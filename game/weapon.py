@@ -0,0 +1,45 @@
+class Weapon:
+    # shot timing, advanced once per simulation tick; the UI draws it
+    def __init__(self, player, shot_length=20, sfx_length=9):
+        self.player = player
+        self.shot_length = shot_length
+        self.shot_length_count = 0
+        self.shot_animation_trigger = True
+        self.shot_animation_speed = 3
+        self.shot_animation_count = 0
+        self.sfx_length = sfx_length
+        self.sfx_length_count = 0
+        self.shot_sound = None
+        self.shots = 0
+        # shot and sfx frames drawn until the next tick, None when not shown
+        self.shot_frame = None
+        self.sfx_frame = None
+
+    def tick(self):
+        if not self.player.shot:
+            self.shot_frame = self.sfx_frame = None
+            return
+        # frames picked before the counters move on, so the first frame of a
+        # shot is drawn and the last one is drawn before the shot ends
+        self.shot_frame = self.shot_length_count
+        self.sfx_frame = (
+            self.sfx_length_count if self.sfx_length_count < self.sfx_length else None
+        )
+        if not self.shot_length_count:
+            if self.shot_sound is not None:
+                self.shot_sound.play()
+            if not self.shot_animation_count:
+                self.shots += 1
+        if self.sfx_length_count < self.sfx_length:
+            self.sfx_length_count += 1
+        self.shot_animation_count += 1
+        if self.shot_animation_count == self.shot_animation_speed:
+            self.shot_animation_count = 0
+            self.shot_length_count += 1
+            self.shot_animation_trigger = False
+        if self.shot_length_count == self.shot_length:
+            self.player.shot = False
+            # self.shot_animation_count = 0
+            self.shot_length_count = 0
+            self.sfx_length_count = 0
+            self.shot_animation_trigger = True
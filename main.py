@@ -1,8 +1,82 @@
+import time
+
+launched = time.perf_counter()
+
+import argparse
+import atexit
+import random
+
+from game.assets import frame_sets
+from game.cache import scaled_surfaces
+from game.controls import LiveInput, RecordingInput
+from game.map import MAP_BUILD_TIME
 from game.player import Player
 from game.sprite import *
-from game.raycaster import ray_casting_walls
+from game.raycaster import caster, ray_casting_walls
+from game.profiler import FrameProfiler
+from game.renderer import FrameBufferRenderer
+from game.resolution import ResolutionController
+from game.timedemo import TimeDemo
+from game.timeline import Timeline
+from game.timestep import FixedTimestep, LockstepTimestep, View
 from game.ui import UI
 from game.logic import Logic
+from game.warmup import WarmUp, startup_report
+
+parser = argparse.ArgumentParser(description="FPS Raycaster")
+parser.add_argument(
+    "--renderer",
+    choices=("columns", "framebuffer"),
+    default=RENDERER,
+    help="wall renderer to use",
+)
+parser.add_argument(
+    "--profile",
+    metavar="PREFIX",
+    help="on exit, write per-frame phase timings to PREFIX.csv and PREFIX.json",
+)
+parser.add_argument(
+    "--dynamic-resolution",
+    action="store_true",
+    help="change the number of rays to hold the target frame rate",
+)
+parser.add_argument(
+    "--startup-report",
+    action="store_true",
+    help="print the launch time of imports, map build, asset load and JIT",
+)
+parser.add_argument(
+    "--tick-rate",
+    type=int,
+    default=TICK_RATE,
+    help="simulation ticks per second, independent of the frame rate",
+)
+parser.add_argument(
+    "--threads",
+    type=int,
+    default=RAY_CASTING_THREADS,
+    help="cast the walls on this many threads, more than 1 casts in parallel",
+)
+parser.add_argument(
+    "--record",
+    metavar="PATH",
+    help="on exit, write the camera and object state of every frame to PATH"
+    " (.npz), to be drawn again by python -m game.offline",
+)
+parser.add_argument(
+    "--record-demo",
+    metavar="PATH",
+    help="on exit, write the keys, mouse turn and clicks of every tick to PATH"
+    " (.npz), to be played back with --timedemo",
+)
+parser.add_argument(
+    "--timedemo",
+    metavar="PATH",
+    help="play the demo at PATH one tick per frame as fast as possible, then"
+    " print the frame rate and frame times",
+)
+args = parser.parse_args()
+imported = time.perf_counter()
 
 # initializing game
 pygame.init()
@@ -10,33 +84,124 @@ screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.DOUBLEBUF)
 clock = pygame.time.Clock()
 
 # game objects
+assets_started = time.perf_counter()
 screen_map = pygame.Surface(MAP_RESOLUTION)
 sprites = SpriteSet()
-player = Player(sprites)
+try:
+    demo = TimeDemo(args.timedemo) if args.timedemo else None
+except ValueError as error:
+    parser.error(str(error))
+controls = LiveInput() if demo is None else demo.controls
+if args.record_demo:
+    controls = RecordingInput(controls)
+    atexit.register(controls.save, args.record_demo, args.tick_rate)
+player = Player(sprites, controls)
 ui = UI(screen, screen_map, player, clock)
-logic = Logic(player, sprites, ui)
+# a demo ends at the win instead of showing the win screen
+logic = Logic(player, sprites, ui if demo is None else None)
+frame_buffer = (
+    FrameBufferRenderer(screen, ui.textures) if args.renderer == "framebuffer" else None
+)
+profiler = FrameProfiler()
+caster.set_threads(args.threads)
+if demo is None:
+    timestep = FixedTimestep(args.tick_rate)
+else:
+    timestep = LockstepTimestep(demo.tick_rate)
+    # the random colors of the UI are the same every run
+    random.seed(TIMEDEMO_SEED)
+# the world is drawn between the player poses of the last two ticks
+view = View(player)
+ui.camera = view
+resolution = ResolutionController(caster) if args.dynamic_resolution else None
+if args.profile:
+    atexit.register(profiler.export, args.profile)
+timeline = Timeline(sprites) if args.record else None
+if timeline is not None:
+    atexit.register(timeline.save, args.record)
+assets_loaded = time.perf_counter()
 
-# displaying initial screen
-ui.menu()
+# displaying initial screen while the kernels compile
+warm_up = WarmUp(sprites, logic, frame_buffer)
+warm_up.start()
+if demo is None:
+    ui.menu()
+warm_up.join()
 pygame.mouse.set_visible(False)
-ui.play_music()
+if demo is None:
+    ui.play_music()
+else:
+    demo.start()
 
 while True:
-    player.movement()
-    ui.background()
-    walls, wall_shot = ray_casting_walls(player, ui.textures)
+    profiler.begin_frame()
+    ticks = timestep.advance()
+    for _ in range(ticks):
+        view.snapshot()
+        sprites.snapshot()
+        player.movement()
+        profiler.mark("movement")
+        # Game Logic, doors, animations and the weapon
+        logic.tick()
+        profiler.mark("logic")
+    view.update(timestep.alpha)
+
+    if frame_buffer:
+        wall_shot = frame_buffer.draw(view)
+        walls, depth_buffer = [], caster.depths
+    else:
+        ui.background()
+        profiler.mark("background")
+        walls, wall_shot = ray_casting_walls(view, ui.wall_textures)
+        depth_buffer = None
+    profiler.mark("walls")
+    if timeline is not None:
+        # the state drawn by locate and the weapon below
+        timeline.capture(
+            time.perf_counter() - launched, view, sprites, player, timestep.alpha
+        )
+    located = sprites.locate(view, caster.depths, caster.heights, timestep.alpha)
+    profiler.mark("sprites")
 
     # UI items
-    ui.world(walls + [obj.object_locate(player) for obj in sprites.list_of_objects])
-    ui.fps(clock)
+    ui.world(walls + located, depth_buffer)
+    profiler.mark("world")
+    if player.show_stats:
+        stats = [
+            sprites.summary(),
+            logic.sight.summary(),
+            scaled_surfaces.summary(),
+            frame_sets.summary(),
+        ]
+        if resolution:
+            stats.append("resolution: " + resolution.resolution)
+        profiler.draw(screen, stats)
+    else:
+        ui.fps(clock, resolution.resolution if resolution else None)
+    profiler.mark("overlay")
     ui.mini_map()
-    ui.player_weapon([wall_shot, sprites.sprite_shot])
-    # Game Logic
-    logic.interaction_objects()
-    logic.enemy_action()
-    logic.clear_world()
-    logic.check_win()
+    profiler.mark("mini_map")
+    ui.player_weapon([wall_shot, sprites.sprite_shot(view)])
+    profiler.mark("weapon")
 
     # Screen refresh
     pygame.display.flip()
     clock.tick()
+    profiler.mark("flip")
+    profiler.end_frame()
+    if args.startup_report and profiler.frames == 1:
+        phases = [
+            ("imports", imported - launched - MAP_BUILD_TIME),
+            ("map build", MAP_BUILD_TIME),
+            ("asset load", assets_loaded - assets_started),
+            ("first frame", profiler.timings[0].sum()),
+        ]
+        print("\n".join(startup_report(phases, warm_up)))
+    if resolution:
+        resolution.update(clock.get_time())
+    if demo is not None:
+        demo.frame()
+        if demo.finished or not sprites.live_enemies:
+            break
+
+print("\n".join(demo.report()))
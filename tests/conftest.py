@@ -0,0 +1,35 @@
+import os
+
+# must be set before pygame is imported, the tests run without a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# a thread pool of two at least, so the parallel kernels are tested in
+# parallel on a single core too
+os.environ.setdefault("NUMBA_NUM_THREADS", str(max(os.cpu_count() or 1, 2)))
+
+import pygame
+import pytest
+from game.assets import load_image
+from game.config import *
+from game.sprite import SpriteSet
+
+
+@pytest.fixture(scope="session")
+def screen():
+    pygame.init()
+    return pygame.display.set_mode((WIDTH, HEIGHT))
+
+
+@pytest.fixture(scope="session")
+def textures(screen):
+    textures = {
+        key: load_image(f"./game/textures/wall{key}.png", alpha=False)
+        for key in range(1, 5)
+    }
+    textures["S"] = load_image("./game/textures/sky.png", alpha=False)
+    return textures
+
+
+@pytest.fixture
+def sprites(screen):
+    return SpriteSet()
@@ -0,0 +1,35 @@
+import time
+
+from game.assets import FrameSet, FrameSets, assets
+from game.cache import scaled_surfaces
+
+PATHS = [f"./game/sprites/barrel/anim/{i}.png" for i in range(12)]
+
+
+def test_prefetched_frames_are_converted_by_tick(screen):
+    registry = FrameSets(unload_frames=10, check_frames=1)
+    frame_set = FrameSet(PATHS, registry)
+    registry.prefetch(frame_set)
+    deadline = time.monotonic() + 10
+    while registry.decoded.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # decoded on the prefetch thread, but not converted there
+    assert frame_set.decoded is not None and not frame_set.loaded
+    registry.tick()
+    assert frame_set.loaded and frame_set.decoded is None
+    assert not registry.requested
+    # already in the display format, nothing left to convert
+    assert assets.display_format(frame_set[0]) is frame_set[0]
+
+
+def test_unload_drops_the_scaled_copies(screen):
+    registry = FrameSets(unload_frames=10, check_frames=1)
+    frame_set = FrameSet(PATHS, registry)
+    before = scaled_surfaces.bytes
+    for frame in range(len(frame_set)):
+        scaled_surfaces.scale(frame_set[frame], (64, 64))
+    assert scaled_surfaces.bytes > before
+    for _ in range(12):
+        registry.tick()
+    assert not frame_set.loaded
+    assert scaled_surfaces.bytes == before
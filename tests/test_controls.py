@@ -0,0 +1,52 @@
+import pygame
+import pytest
+
+from game.controls import (
+    RecordingInput,
+    ScriptedInput,
+    load_demo,
+    save_demo,
+    wander,
+)
+from game.timedemo import TimeDemo
+
+
+def test_demo_round_trip(tmp_path):
+    steps = wander(500, seed=2) + [
+        ((pygame.K_s, pygame.K_LEFT, pygame.K_RIGHT), -300, True),
+        ((), 0, False),
+    ]
+    save_demo(tmp_path / "demo.npz", steps, tick_rate=30)
+    assert load_demo(tmp_path / "demo.npz") == (steps, 30)
+
+
+def test_recorded_steps_replay_as_given(screen, tmp_path):
+    steps = wander(50, seed=3)
+    recording = RecordingInput(ScriptedInput(steps))
+    for _ in steps:
+        recording.pressed()
+        recording.events()
+        recording.turn()
+    recording.save(tmp_path / "demo.npz")
+    assert load_demo(tmp_path / "demo.npz")[0] == steps
+
+
+def test_empty_demos_are_rejected(tmp_path):
+    save_demo(tmp_path / "empty.npz", [])
+    with pytest.raises(ValueError, match="no ticks"):
+        load_demo(tmp_path / "empty.npz")
+    with pytest.raises(ValueError, match="no ticks"):
+        TimeDemo(tmp_path / "empty.npz")
+
+
+def test_scripted_input_pumps_the_window(screen):
+    controls = ScriptedInput([((), 0, True)])
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_F3))
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+    events = controls.events()
+    # the window can be closed, its other input does not change the demo
+    assert [event.type for event in events] == [
+        pygame.QUIT,
+        pygame.MOUSEBUTTONDOWN,
+    ]
+    assert not pygame.event.peek()
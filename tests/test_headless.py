@@ -0,0 +1,24 @@
+from game.assets import assets
+from game.controls import ScriptedInput, wander
+from game.headless import simulate
+
+TIMINGS = ("first_tick", "ticks_per_second", "real_time_factor")
+
+
+def run(monkeypatch, ticks, seed):
+    # simulate turns the display conversion off for the whole process
+    monkeypatch.setattr(assets, "convert", assets.convert)
+    report = simulate(ScriptedInput(wander(ticks, seed)), ticks)
+    return {key: value for key, value in report.items() if key not in TIMINGS}
+
+
+def test_opened_doors_slide_away(monkeypatch):
+    start = run(monkeypatch, 1, 0)
+    report = run(monkeypatch, 6000, 0)
+    assert report["doors_opened"] >= 1
+    # opened doors are removed, killed enemies stay as corpses
+    assert report["objects"] == start["objects"] - report["doors_opened"]
+
+
+def test_runs_are_deterministic(monkeypatch):
+    assert run(monkeypatch, 1500, 4) == run(monkeypatch, 1500, 4)
@@ -0,0 +1,163 @@
+import numpy as np
+import pytest
+
+from benchmarks.harness import legacy_blocked_doors
+from benchmarks.poses import random_poses
+from game.config import *
+from game.controls import ScriptedInput
+from game.logic import (
+    Logic,
+    enemies_line_of_sight,
+    enemies_line_of_sight_parallel,
+    line_of_sight,
+    ray_casting_enemy_player,
+)
+from game.map import GRID_MAP, WORLD_MAP
+from game.player import Player
+
+
+@pytest.fixture
+def logic(sprites):
+    player = Player(sprites, ScriptedInput([((), 0, False)]))
+    return Logic(player, sprites, None)
+
+
+def exact(logic, slots):
+    player = logic.player
+    return np.array(
+        [
+            line_of_sight(
+                *logic.sprites.positions[slot].tolist(),
+                float(player.x),
+                float(player.y),
+                GRID_MAP,
+                logic.sprites.door_grid,
+            )
+            for slot in slots
+        ]
+    )
+
+
+def test_memoized_line_of_sight_is_exact_on_first_sight(logic):
+    slots = logic.sprites.live_enemy_slots()
+    for pose in random_poses(100, seed=3):
+        logic.player.x, logic.player.y = pose.x, pose.y
+        logic.sight.clear()
+        # one enemy per tile: every lookup is a cast
+        tiles = {}
+        for slot in slots.tolist():
+            x, y = logic.sprites.positions[slot].tolist()
+            tiles.setdefault((int(x // TILE), int(y // TILE)), slot)
+        first = np.array(sorted(tiles.values()))
+        assert (logic.line_of_sight(first) == exact(logic, first)).all()
+
+
+def test_memoized_line_of_sight_mostly_agrees_with_exact(logic):
+    slots = logic.sprites.live_enemy_slots()
+    agree = []
+    for pose in random_poses(300, seed=4):
+        logic.player.x, logic.player.y = pose.x, pose.y
+        agree.append(np.mean(logic.line_of_sight(slots) == exact(logic, slots)))
+    # positions within a tile share one answer
+    assert np.mean(agree) > 0.97
+
+
+def test_opening_a_door_drops_the_memo(logic):
+    sprites = logic.sprites
+    logic.line_of_sight(sprites.live_enemy_slots())
+    assert logic.sight.stats["entries"]
+    door = next(obj for obj in sprites.slots if obj.flag == "door_h")
+    sprites.open_door(door)
+    logic.line_of_sight(sprites.live_enemy_slots()[:1])
+    assert logic.sight.stats["entries"] == 1
+
+
+def shoot(logic, enemy, x, y):
+    player = logic.player
+    player.x, player.y, player.angle = x, y, 0.0
+    player.shot = True
+    logic.sprites.project(player)
+    logic.interaction_objects()
+    return enemy.is_dead
+
+
+@pytest.mark.parametrize("memo", [0, 1])
+def test_shots_cast_exactly(logic, memo):
+    # a soldier at (2.5, 1.5) seen from (1.3, 1.5), nothing in between; the
+    # memo is filled with the wrong answer for the player tile
+    enemy = next(obj for obj in logic.sprites.slots if obj.flag == "enemy")
+    assert (enemy.x, enemy.y) == (2.5 * TILE, 1.5 * TILE)
+    logic.sight.memo((1, 1), logic.sprites.door_version)[:] = memo
+    assert shoot(logic, enemy, 1.3 * TILE, 1.5 * TILE)
+
+
+def test_shots_do_not_go_through_walls(logic):
+    # the soldier at (7.68, 1.47) stands behind the wall at (6, 1), the memo
+    # says it is in sight; the soldiers in front of it are dead
+    sprites = logic.sprites
+    enemies = [obj for obj in sprites.slots if obj.flag == "enemy"]
+    sprites.kill(enemies[0])
+    sprites.kill(enemies[1])
+    enemy = enemies[3]
+    assert (enemy.x, enemy.y) == pytest.approx((768, 147))
+    logic.sight.memo((1, 1), sprites.door_version)[:] = 1
+    assert not shoot(logic, enemy, 1.3 * TILE, 1.5 * TILE)
+
+
+@pytest.fixture
+def positions(logic):
+    # enemies spread over the open tiles, every tile at most once
+    sprites = logic.sprites
+    for slot, pose in zip(sprites.live_enemy_slots(), random_poses(200, seed=5)):
+        sprites.positions[slot] = pose.x, pose.y
+    return sprites.positions
+
+
+def test_batched_cast_matches_the_legacy_cast(logic, positions):
+    sprites = logic.sprites
+    slots = sprites.live_enemy_slots()
+    # open some doors on the way
+    for door in [obj for obj in sprites.slots if obj.flag == "door_v"][:3]:
+        sprites.open_door(door)
+    blocked_doors = legacy_blocked_doors(sprites)
+    # an empty memo caches nothing, every enemy is cast
+    memo = np.full((0, 0), -1, dtype=np.int8)
+    for pose in random_poses(50, seed=6):
+        visible = np.zeros(len(slots), dtype=np.bool_)
+        casts = enemies_line_of_sight(
+            positions, slots, pose.x, pose.y, GRID_MAP, sprites.door_grid, memo, visible
+        )
+        assert casts == len(slots)
+        expected = [
+            ray_casting_enemy_player(x, y, blocked_doors, WORLD_MAP, (pose.x, pose.y))
+            for x, y in positions[slots].tolist()
+        ]
+        assert visible.tolist() == expected
+
+
+def test_parallel_cast_matches_the_serial_cast(logic, positions):
+    sprites = logic.sprites
+    slots = sprites.live_enemy_slots()
+    # put some enemies on the same tile, only the first one is cast
+    positions[slots[1::4]] = positions[slots[::4]][: len(slots[1::4])] + 10
+    memos = [np.full(GRID_MAP.shape, -1, dtype=np.int8) for _ in range(2)]
+    for pose in random_poses(50, seed=7):
+        results = []
+        for cast, memo in zip(
+            (enemies_line_of_sight, enemies_line_of_sight_parallel), memos
+        ):
+            visible = np.zeros(len(slots), dtype=np.bool_)
+            casts = cast(
+                positions,
+                slots,
+                pose.x,
+                pose.y,
+                GRID_MAP,
+                sprites.door_grid,
+                memo,
+                visible,
+            )
+            results.append((casts, visible.tolist(), memo.tolist()))
+        assert results[0] == results[1]
+        for memo in memos:
+            memo[:] = -1
@@ -0,0 +1,93 @@
+import numba
+import numpy as np
+import pytest
+
+from benchmarks.poses import Pose, path_poses, random_poses
+from game.config import *
+from game.map import WORLD_MAP
+from game.raycaster import (
+    RayCaster,
+    ray_casting,
+    ray_casting_dda_parallel,
+    ray_casting_walls,
+)
+from game.renderer import FrameBufferRenderer
+from game.textures import WallTextures
+
+
+@pytest.fixture(scope="module")
+def poses():
+    return random_poses(300, seed=1) + path_poses()[::10]
+
+
+def test_dda_matches_legacy_ray_casting(poses):
+    caster = RayCaster(NUM_RAYS, threads=1)
+    for pose in poses:
+        caster.cast(pose)
+        legacy = np.array(ray_casting((pose.x, pose.y), pose.angle, WORLD_MAP))
+        # the legacy kernel adds DELTA_ANGLE ray by ray, so a depth can be an
+        # ulp away and its truncated height or texture offset one pixel off
+        np.testing.assert_allclose(caster.depths, legacy[:, 0], rtol=1e-9)
+        offsets = np.abs(caster.offsets - legacy[:, 1])
+        assert (np.minimum(offsets, TILE - offsets) <= 1).all()
+        assert (np.abs(caster.heights - legacy[:, 2]) <= 1).all()
+        np.testing.assert_array_equal(caster.textures, legacy[:, 3])
+
+
+def test_buffers_are_reused(poses):
+    caster = RayCaster(NUM_RAYS, threads=1)
+    depths = caster.depths
+    caster.cast(poses[0])
+    first = depths.copy()
+    caster.cast(poses[1])
+    assert caster.depths is depths
+    assert not np.array_equal(first, depths)
+
+
+def test_resize_changes_the_ray_count(poses):
+    caster = RayCaster(NUM_RAYS, threads=1)
+    caster.resize(NUM_RAYS // 2)
+    caster.cast(poses[0])
+    assert caster.depths.shape == (NUM_RAYS // 2,)
+    assert len(caster.columns) == NUM_RAYS // 2
+    assert sum(width for _, width in caster.columns) == WIDTH
+
+
+def test_parallel_caster_matches_serial(poses):
+    serial = RayCaster(2400, threads=1)
+    parallel = RayCaster(2400, threads=2)
+    assert parallel.kernel is ray_casting_dda_parallel
+    for pose in poses:
+        serial.cast(pose)
+        parallel.cast(pose)
+        for name in ("depths", "offsets", "heights", "textures"):
+            np.testing.assert_array_equal(
+                getattr(parallel, name), getattr(serial, name)
+            )
+
+
+def test_thread_count_only_applies_to_the_wall_cast(poses):
+    threads = numba.get_num_threads()
+    numba.set_num_threads(1)
+    try:
+        caster = RayCaster(NUM_RAYS, threads=2)
+        caster.cast(poses[0])
+        assert numba.get_num_threads() == 1
+    finally:
+        numba.set_num_threads(threads)
+
+
+def test_walls_right_against_the_camera(screen, textures):
+    # a few rays hit the wall closer than PROJECTION_COEFFICIENT / 2 ** 31
+    pose = Pose(1050, 300, 3.5)
+    caster = RayCaster(NUM_RAYS, threads=1)
+    caster.cast(pose)
+    legacy = np.array(ray_casting((pose.x, pose.y), pose.angle, WORLD_MAP))
+    assert caster.heights.max() > 2**31
+    np.testing.assert_array_equal(caster.heights, legacy[:, 2])
+
+    walls, _ = ray_casting_walls(pose, WallTextures(textures))
+    assert all(column.get_height() == HEIGHT for _, column, _ in walls)
+    renderer = FrameBufferRenderer(screen, textures)
+    renderer.draw(pose)
+    assert renderer.mask.all()
@@ -0,0 +1,245 @@
+import math
+from collections import deque
+
+import numpy as np
+import pytest
+
+from benchmarks.harness import legacy_blocked_doors
+from benchmarks.poses import random_poses
+from game.config import *
+from game.controls import ScriptedInput
+from game.logic import Logic
+from game.player import Player
+from game.sprite import Sprite, viewing_angle_frame
+
+# the viewing angle sectors of Sprite before project_sprites, in degrees
+LEGACY_SECTORS = {
+    8: [frozenset(range(338, 361)) | frozenset(range(0, 23))]
+    + [frozenset(range(i, i + 45)) for i in range(23, 338, 45)],
+    16: [frozenset(range(348, 361)) | frozenset(range(0, 11))]
+    + [frozenset(range(i, i + 23)) for i in range(11, 348, 23)],
+}
+
+
+def legacy_sector(theta, frames):
+    if theta < 0:
+        theta += 2 * math.pi
+    theta = 360 - int(math.degrees(theta))
+    for sector, angles in enumerate(LEGACY_SECTORS[frames]):
+        if theta in angles:
+            return sector
+    return -1
+
+
+@pytest.mark.parametrize("frames", [8, 16])
+def test_viewing_angle_frame_matches_legacy_sectors(frames):
+    for theta in np.linspace(-3 * math.pi, 3 * math.pi, 20001).tolist():
+        assert viewing_angle_frame(theta, frames) == legacy_sector(theta, frames)
+
+
+def test_viewing_angle_frame_without_angles():
+    assert viewing_angle_frame(1.0, 0) == -1
+
+
+def legacy_projection(obj, player):
+    # Sprite.object_locate before project_sprites, up to the frame scaling
+    dx, dy = obj.x - player.x, obj.y - player.y
+    distance = math.sqrt(dx**2 + dy**2)
+    theta = math.atan2(dy, dx)
+    gamma = theta - player.angle
+    if dx > 0 and 180 <= math.degrees(player.angle) <= 360 or dx < 0 and dy < 0:
+        gamma += 2 * math.pi
+    theta -= 1.4 * gamma
+    current_ray = CENTER_RAY + int(gamma / DELTA_ANGLE)
+    door = obj.flag in {"door_h", "door_v"}
+    if not door:
+        distance *= math.cos(HALF_FOV - current_ray * DELTA_ANGLE)
+    fake_ray = current_ray + FAKE_RAYS
+    if not (0 <= fake_ray <= FAKE_RAYS_RANGE and distance > 30):
+        return None
+    height = min(
+        int(PROJECTION_COEFFICIENT / distance), HEIGHT if door else DOUBLE_HEIGHT
+    )
+    size = (int(height * obj.scale[0]), int(height * obj.scale[1]))
+    sector = (
+        legacy_sector(theta, len(obj.sprite_positions)) if obj.viewing_angles else -1
+    )
+    return distance, current_ray, height, size, sector
+
+
+def test_project_sprites_matches_object_locate(sprites):
+    for pose in random_poses(200, seed=2):
+        sprites.project(pose)
+        for obj in sprites.slots:
+            expected = legacy_projection(obj, pose)
+            assert bool(sprites.visible[obj.slot]) == (expected is not None)
+            if expected is None:
+                continue
+            distance, current_ray, height, size, sector = expected
+            assert obj.distance_to_sprite == pytest.approx(distance, rel=1e-9)
+            assert obj.current_ray == current_ray
+            assert obj.projection_height == height
+            assert tuple(sprites.sizes[obj.slot].tolist()) == size
+            assert sprites.frame_index[obj.slot] == sector
+
+
+def test_sprites_keep_their_vertical_anchor(sprites):
+    # dead enemies are drawn 1.3 times shorter, from the same top as alive
+    enemies = [obj for obj in sprites.slots if obj.flag == "enemy"]
+    for obj in enemies[::2]:
+        sprites.kill(obj)
+    drawn = 0
+    for pose in random_poses(100, seed=4):
+        sprites.project(pose)
+        for obj in enemies:
+            if not sprites.visible[obj.slot]:
+                continue
+            width, height = sprites.sizes[obj.slot].tolist()
+            frame = int(sprites.frame_index[obj.slot])
+            _, sprite, (_, y) = obj.object_locate(width, height, frame)
+            shift = obj.dead_shift if obj.is_dead else obj.shift
+            assert y == HALF_HEIGHT - height // 2 + height // 2 * shift
+            drawn += bool(obj.is_dead)
+    assert drawn
+
+
+def test_removed_slots_are_skipped_and_reused(sprites):
+    obj = sprites.slots[0]
+    sprites.remove(obj)
+    assert sprites.count == len(sprites.slots) - 1
+    sprites.project(random_poses(1)[0])
+    assert not sprites.visible[obj.slot]
+    sprites.add(obj)
+    assert sprites.slots[obj.slot] is obj
+    assert sprites.count == len(sprites.slots)
+
+
+def legacy_animation(frames, speed, calls):
+    # Sprite.sprite_animation on a deque before the frame indices
+    frames, count = deque(frames), 0
+    for _ in range(calls):
+        yield frames[0]
+        if count < speed:
+            count += 1
+        else:
+            frames.rotate(-1)
+            count = 0
+
+
+def legacy_action(frames, speed, calls):
+    # Sprite.enemy_in_action, rotating the other way
+    frames, count = deque(frames), 0
+    for _ in range(calls):
+        yield frames[0]
+        if count < speed:
+            count += 1
+        else:
+            frames.rotate()
+            count = 0
+
+
+def legacy_death(frames, speed, calls):
+    # Sprite.dead_animation, the last frame stays once the deque is empty
+    frames, count, sprite = deque(frames), 0, None
+    for _ in range(calls):
+        if len(frames):
+            if count < speed:
+                sprite = frames[0]
+                count += 1
+            else:
+                sprite = frames.popleft()
+                count = 0
+        yield sprite
+
+
+def first(sprites, kind):
+    params = sprites.sprite_params[kind]
+    return next(obj for obj in sprites.slots if obj.object is params["sprite"])
+
+
+def test_animation_frames_match_deque_rotation(sprites):
+    obj = first(sprites, "sprite_barrel")
+    sprites.distances[obj.slot] = 0
+    expected = legacy_animation(list(obj.animation), obj.animation_speed, 100)
+    for frame in expected:
+        assert obj.sprite_animation() is frame
+        obj.tick()
+
+
+def test_action_frames_match_deque_rotation(sprites):
+    obj = first(sprites, "enemy_soldier0")
+    obj.enemy_action_trigger = True
+    expected = legacy_action(list(obj.obj_action), obj.animation_speed, 100)
+    for frame in expected:
+        assert obj.enemy_in_action() is frame
+        obj.tick()
+
+
+def test_death_frames_match_deque_popleft(sprites):
+    obj = first(sprites, "enemy_devil1")
+    sprites.kill(obj)
+    expected = legacy_death(list(obj.death_animation), obj.animation_speed, 150)
+    for frame in expected:
+        assert obj.dead_animation() is frame
+        obj.tick()
+
+
+def test_live_enemies_are_counted_incrementally(sprites):
+    enemies = [obj for obj in sprites.slots if obj.flag == "enemy"]
+    assert sprites.live_enemies == len(enemies)
+    sprites.kill(enemies[0])
+    sprites.kill(enemies[0])
+    sprites.remove(enemies[1])
+    assert sprites.live_enemies == len(enemies) - 2
+    assert list(sprites.live_enemy_slots()) == [obj.slot for obj in enemies[2:]]
+
+
+def test_culled_doors_still_open(sprites):
+    player = Player(sprites, ScriptedInput([((), 0, False)]))
+    logic = Logic(player, sprites, None)
+    door = next(obj for obj in sprites.slots if obj.flag == "door_v")
+    sprites.open_door(door)
+    # a wall right in front of every ray hides all the sprites
+    depths = np.ones(NUM_RAYS)
+    heights = np.full(NUM_RAYS, 100 * HEIGHT, dtype=np.int32)
+    for _ in range(TILE // 3 + 1):
+        player.movement()
+        logic.tick()
+        sprites.locate(player, depths, heights)
+        assert sprites.drawn == 0
+    assert sprites.culled_occluded
+    assert door.sprites is None
+
+
+def door_tiles(sprites):
+    rows, columns = np.nonzero(sprites.door_grid)
+    return {(int(i) * TILE, int(j) * TILE) for j, i in zip(rows, columns)}
+
+
+def test_door_grid_matches_legacy_blocked_doors(sprites):
+    def legacy():
+        return {tuple(tile) for tile in legacy_blocked_doors(sprites).keys()}
+
+    assert door_tiles(sprites) == legacy() and legacy()
+    doors = [obj for obj in sprites.slots if obj.flag in ("door_h", "door_v")]
+    version = sprites.door_version
+    # opened, sliding away, removed
+    sprites.open_door(doors[0])
+    assert door_tiles(sprites) == legacy()
+    assert sprites.door_version > version
+    for _ in range(TILE // 3 + 1):
+        sprites.tick()
+    sprites.clear_deleted()
+    assert doors[0].sprites is None
+    assert door_tiles(sprites) == legacy()
+    # a closed door removed and added back
+    sprites.remove(doors[1])
+    assert door_tiles(sprites) == legacy()
+    sprites.add(doors[1])
+    assert door_tiles(sprites) == legacy()
+    # two doors on one tile stay blocked until both are open
+    twin = Sprite(sprites.sprite_params["sprite_door_h"], (5.5, 4.5))
+    sprites.add(twin)
+    sprites.open_door(twin)
+    assert door_tiles(sprites) == legacy()
+    assert sprites.door_grid.min() >= 0
@@ -0,0 +1,23 @@
+import pytest
+
+from game.config import *
+from game.textures import WallTextures
+
+
+@pytest.fixture(scope="module")
+def walls(textures):
+    return WallTextures(textures)
+
+
+def test_strips_come_from_the_smallest_level_tall_enough(walls):
+    for height in range(1, TEXTURE_HEIGHT + 1):
+        strip = walls.strip(1, 0, height)
+        level = walls.level_index[height]
+        assert strip is walls.levels[1][level][0]
+        assert strip.get_height() >= height
+    assert walls.strip(1, 0, 10 * TEXTURE_HEIGHT) is walls.levels[1][0][0]
+
+
+@pytest.mark.parametrize("height", [0, -1, -795705958])
+def test_non_positive_heights_use_the_smallest_level(walls, height):
+    assert walls.strip(2, 5, height) is walls.strip(2, 5, 1)
@@ -0,0 +1,68 @@
+from game.config import *
+from game.controls import ScriptedInput
+from game.logic import Logic
+from game.player import Player
+from game.sprite import SpriteSet
+from game.timeline import Timeline
+
+
+def objects_state(objects):
+    return [
+        (
+            None
+            if obj.sprites is None
+            else (
+                tuple(obj.xy.tolist()),
+                obj.animation_frame,
+                obj.action_frame,
+                min(obj.death_frame, max(len(obj.death_animation) - 1, 0)),
+                obj.is_dead is True,
+                bool(obj.blocked),
+            )
+        )
+        for obj in objects
+    ]
+
+
+def weapon_state(player):
+    weapon = player.weapon
+    return player.shot, weapon.shot_frame, weapon.sfx_frame
+
+
+def test_restore_puts_back_the_captured_frames(screen, tmp_path):
+    # shoot the door in front of the player open while a soldier dies
+    sprites = SpriteSet()
+    steps = [((), 0, tick == 0) for tick in range(60)]
+    player = Player(sprites, ScriptedInput(steps))
+    logic = Logic(player, sprites, None)
+    player.x, player.y, player.angle = 8.6 * TILE, 4.5 * TILE, 0.0
+    objects = list(sprites.slots)
+    sprites.kill(next(obj for obj in objects if obj.flag == "enemy"))
+    timeline = Timeline(sprites)
+    expected = []
+    for tick in range(len(steps)):
+        sprites.snapshot()
+        player.movement()
+        logic.tick()
+        timeline.capture(tick / TICK_RATE, player, sprites, player)
+        expected.append(
+            (
+                (player.x, player.y, player.angle),
+                objects_state(objects),
+                weapon_state(player),
+            )
+        )
+    assert expected[0][1] != expected[-1][1]
+    assert None in expected[-1][1]
+    timeline.save(tmp_path / "session.npz")
+
+    loaded = Timeline.load(tmp_path / "session.npz")
+    assert len(loaded) == len(steps)
+    other = SpriteSet()
+    replay = Player(other)
+    # forwards, then back past the removal of the door
+    for frame in list(range(len(steps))) + [50, 3, 0]:
+        camera = loaded.restore(frame, other, replay)
+        assert tuple(camera) == expected[frame][0]
+        assert objects_state(loaded.objects) == expected[frame][1]
+        assert weapon_state(replay) == expected[frame][2]
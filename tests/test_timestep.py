@@ -0,0 +1,128 @@
+import math
+
+import pygame
+import pytest
+
+from game import timestep
+from game.config import *
+from game.controls import ScriptedInput
+from game.logic import Logic
+from game.player import Player
+from game.timestep import FixedTimestep, LockstepTimestep, View
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(timestep.time, "perf_counter", clock)
+    return clock
+
+
+# a power of two, so the tick and its multiples are exact
+TICK = 1 / 64
+
+
+def test_fixed_timestep_runs_the_ticks_due(clock):
+    steps = FixedTimestep(tick_rate=64, max_ticks=5)
+    # the first frame runs one tick
+    assert steps.advance() == 1
+    clock.now += 2.5 * TICK
+    assert steps.advance() == 2
+    assert steps.alpha == 0.5
+    clock.now += 0.5 * TICK
+    assert steps.advance() == 1
+    assert steps.alpha == 0.0
+    assert steps.ticks == 4
+
+
+def test_fixed_timestep_drops_what_a_slow_frame_cannot_catch_up(clock):
+    steps = FixedTimestep(tick_rate=64, max_ticks=5)
+    steps.advance()
+    clock.now += 64 * TICK
+    assert steps.advance() == 5
+    assert steps.dropped == 59 * TICK
+    clock.now += TICK
+    assert steps.advance() == 1
+
+
+def test_lockstep_runs_one_tick_per_frame(clock):
+    steps = LockstepTimestep(tick_rate=50)
+    clock.now += 10
+    assert [steps.advance() for _ in range(3)] == [1, 1, 1]
+    assert steps.alpha == 1.0
+
+
+def test_view_turns_the_short_way_around(screen, sprites):
+    player = Player(sprites)
+    player.angle = 2 * math.pi - 0.1
+    view = View(player)
+    player.angle = 0.1
+    view.update(0.5)
+    assert view.angle == pytest.approx(0.0, abs=1e-9) or view.angle == pytest.approx(
+        2 * math.pi
+    )
+
+
+def world(sprites, steps):
+    player = Player(sprites, ScriptedInput(steps))
+    return player, Logic(player, sprites, None)
+
+
+def state(sprites):
+    return [
+        (
+            tuple(obj.xy.tolist()),
+            obj.animation_frame,
+            obj.animation_count,
+            obj.action_frame,
+            obj.death_frame,
+        )
+        for obj in sprites.slots
+        if obj is not None
+    ]
+
+
+def test_world_advances_the_same_whatever_is_drawn(screen):
+    from game.sprite import SpriteSet
+
+    # shoot the door in front of the player open, drawing every tick in one
+    # run and every fifth tick from an interpolated camera in the other
+    steps = [((), 0, tick == 0) for tick in range(60)]
+    runs = []
+    for every in (1, 5):
+        sprites = SpriteSet()
+        player, logic = world(sprites, steps)
+        player.x, player.y, player.angle = 8.6 * TILE, 4.5 * TILE, 0.0
+        doors = int(sprites.door_grid.sum())
+        view = View(player)
+        for tick in range(len(steps)):
+            view.snapshot()
+            sprites.snapshot()
+            player.movement()
+            logic.tick()
+            if tick % every == 0:
+                view.update(0.3)
+                sprites.locate(view, alpha=0.3)
+        assert int(sprites.door_grid.sum()) == doors - 1
+        runs.append((state(sprites), sprites.count, player.weapon.shots))
+    assert runs[0] == runs[1]
+
+
+def test_doors_open_off_screen(sprites):
+    player, logic = world(sprites, [((), 0, False)])
+    door = next(obj for obj in sprites.slots if obj.flag == "door_h")
+    i, j = int(door.x // TILE), int(door.y // TILE)
+    sprites.open_door(door)
+    # the door is never drawn, it still slides a tile and goes away
+    for _ in range(TILE // 3 + 1):
+        logic.tick()
+    assert door.sprites is None
+    assert not sprites.door_grid[j, i]
@@ -0,0 +1,74 @@
+from collections import deque
+
+import pygame
+
+from game.controls import ScriptedInput
+from game.logic import Logic
+from game.player import Player
+from game.ui import UI
+
+
+def legacy_weapon_frames(shot_length, sfx_length, frames):
+    # the shot and sfx frames UI.player_weapon drew, one frame per tick,
+    # rotating its deques after drawing
+    shot_animation = deque(range(shot_length))
+    sfx = deque(range(sfx_length))
+    shot, shot_length_count, shot_animation_count, sfx_length_count = True, 0, 0, 0
+    drawn = []
+    for _ in range(frames):
+        if not shot:
+            drawn.append((None, None))
+            continue
+        sfx_frame = None
+        if sfx_length_count < sfx_length:
+            sfx_frame = sfx[0]
+            sfx_length_count += 1
+            sfx.rotate(-1)
+        drawn.append((shot_animation[0], sfx_frame))
+        shot_animation_count += 1
+        if shot_animation_count == 3:
+            shot_animation.rotate(-1)
+            shot_animation_count = 0
+            shot_length_count += 1
+        if shot_length_count == shot_length:
+            shot = False
+            shot_length_count = 0
+            sfx_length_count = 0
+    return drawn
+
+
+class Recorder:
+    # stands in for the screen, keeps the shot and sfx frames blitted
+    def __init__(self, shots):
+        self.shots = shots
+        self.drawn = []
+
+    def blit(self, surface, position):
+        if surface in self.shots:
+            self.drawn[-1][0] = self.shots.index(surface)
+        elif surface.get_at((0, 0)).g == 255:
+            self.drawn[-1][1] = surface.get_at((0, 0)).r
+
+
+def test_weapon_draws_the_legacy_frame_sequence(screen, sprites):
+    steps = [((), 0, tick == 0) for tick in range(80)]
+    player = Player(sprites, ScriptedInput(steps))
+    logic = Logic(player, sprites, None)
+    ui = UI(screen, pygame.Surface((1, 1)), player, pygame.time.Clock())
+    ui.weapon.shot_sound = None
+    # frames told apart by identity, the sfx by colour as they are scaled
+    ui.weapon_shot_animation = [pygame.Surface((4, 4)) for _ in range(20)]
+    ui.sfx = []
+    for n in range(9):
+        ui.sfx.append(pygame.Surface((4, 4)))
+        ui.sfx[-1].fill((n, 255, 0))
+    ui.screen = Recorder(ui.weapon_shot_animation)
+    for _ in steps:
+        player.movement()
+        logic.tick()
+        ui.screen.drawn.append([None, None])
+        ui.player_weapon([(1.0, 64)])
+    drawn = [tuple(frames) for frames in ui.screen.drawn]
+    assert drawn == legacy_weapon_frames(20, 9, len(steps))
+    assert drawn[0] == (0, 0)
+    assert sum(shot is not None for shot, _ in drawn) == 60